@@ -5,11 +5,15 @@ User Registration System Package
 from .user_registration import (
     EmailValidator,
     PasswordValidator,
-    UserRegistrationSystem
+    UserRegistrationSystem,
+    validate_email,
+    validate_password
 )
 from .user_storage import (
     InMemoryUserStore,
-    FileBasedUserStore
+    FileBasedUserStore,
+    SaveResult,
+    UserRecord
 )
 from .cache_layer import (
     LRUCache,
@@ -20,8 +24,12 @@ __all__ = [
     'EmailValidator',
     'PasswordValidator',
     'UserRegistrationSystem',
+    'validate_email',
+    'validate_password',
     'InMemoryUserStore',
     'FileBasedUserStore',
+    'SaveResult',
+    'UserRecord',
     'LRUCache',
     'CachedUserStore'
 ]
@@ -8,6 +8,11 @@ from typing import Dict, Optional, Any
 from threading import Lock
 from collections import OrderedDict
 
+try:
+    from .user_storage import SaveResult
+except ImportError:  # imported as a top-level module by scripts and tests
+    from user_storage import SaveResult
+
 
 class CacheEntry:
     """Represents a cached entry with TTL"""
@@ -247,6 +252,36 @@ class CachedUserStore:
         
         return success
     
+    def save_if_absent(self, email: str, user_data: Dict) -> SaveResult:
+        """
+        Save user if the email is new and cache the stored record
+        
+        Args:
+            email: Normalized (lowercase) email address
+            user_data: User data dictionary
+        
+        Returns:
+            SaveResult from the underlying store
+        """
+        # Known duplicates are rejected from cache without touching the store
+        if self.cache.get(self._duplicate_key(email)):
+            return SaveResult.DUPLICATE
+        
+        result = self.user_store.save_if_absent(email, user_data)
+        
+        if result is SaveResult.OK:
+            user_id = user_data['user_id']
+            
+            # Invalidate related cache entries
+            self._invalidate_user_cache(email, user_id)
+            
+            # Cache the new user data
+            self.cache.set(self._email_key(email), user_data)
+            self.cache.set(self._id_key(user_id), user_data)
+            self.cache.set(self._duplicate_key(email), True)
+        
+        return result
+    
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """
         Get user by email (cached)
@@ -312,6 +347,28 @@ class CachedUserStore:
         """
         return self.user_store.get_all_users()
     
+    def iter_users(self) -> tuple:
+        """
+        Get a snapshot of all users (not cached)
+        
+        Returns:
+            Tuple of user data
+        """
+        return self.user_store.iter_users()
+    
+    def get_users_page(self, offset: int = 0, limit: int = 100) -> list:
+        """
+        Get one page of users (not cached)
+        
+        Args:
+            offset: Number of users to skip
+            limit: Maximum number of users to return
+        
+        Returns:
+            List of user data
+        """
+        return self.user_store.get_users_page(offset, limit)
+    
     def delete_user(self, email: str) -> bool:
         """
         Delete user and invalidate cache
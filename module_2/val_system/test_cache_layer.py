@@ -368,11 +368,11 @@ class TestCachedUserStore(unittest.TestCase):
         # Save user
         self.cached_store.save_user(self.test_user)
         
-        # Measure uncached access (first time)
-        self.cached_store.cache.clear()
+        # Measure uncached access (cache miss on every lookup)
         start = time.time()
         for _ in range(100):
-            self.underlying_store.get_user_by_email("test@example.com")
+            self.cached_store.cache.clear()
+            self.cached_store.get_user_by_email("test@example.com")
         uncached_time = time.time() - start
         
         # Measure cached access
@@ -4,17 +4,17 @@ Tests email validation, password requirements, duplicate checking, and JWT token
 """
 
 import unittest
+from unittest.mock import patch
 import os
 import json
 from datetime import datetime, timedelta
-import jwt
 
 from user_registration import (
     EmailValidator,
     PasswordValidator,
     UserRegistrationSystem
 )
-from user_storage import InMemoryUserStore, FileBasedUserStore
+from user_storage import InMemoryUserStore, FileBasedUserStore, SaveResult, UserRecord
 
 
 class TestEmailValidator(unittest.TestCase):
@@ -60,6 +60,18 @@ class TestEmailValidator(unittest.TestCase):
         self.assertFalse(is_valid)
         self.assertIn("too long", msg)
     
+    def test_email_local_part_too_long(self):
+        """Test email whose local part exceeds 64 characters"""
+        is_valid, msg = self.validator.validate("a" * 65 + "@test.com")
+        self.assertFalse(is_valid)
+        self.assertIn("local part is too long", msg)
+    
+    def test_email_multiple_at_symbols(self):
+        """Test email with more than one @ symbol"""
+        is_valid, msg = self.validator.validate("user@@domain.com")
+        self.assertFalse(is_valid)
+        self.assertIn("exactly one @", msg)
+    
     def test_empty_email(self):
         """Test empty email"""
         is_valid, msg = self.validator.validate("")
@@ -156,6 +168,21 @@ class TestInMemoryUserStore(unittest.TestCase):
         self.assertTrue(self.store.check_duplicate("test@example.com"))
         self.assertTrue(self.store.check_duplicate("TEST@EXAMPLE.COM"))  # Case insensitive
     
+    def test_save_if_absent(self):
+        """Test saving only when the email is not registered"""
+        user_data = {
+            'user_id': 'test123',
+            'email': 'test@example.com',
+            'password_hash': 'hash',
+            'salt': 'salt'
+        }
+        other = dict(user_data, user_id='test456')
+        
+        self.assertIs(self.store.save_if_absent('test@example.com', user_data), SaveResult.OK)
+        self.assertIs(self.store.save_if_absent('test@example.com', other), SaveResult.DUPLICATE)
+        self.assertEqual(self.store.get_user_by_email('test@example.com')['user_id'], 'test123')
+        self.assertIsNone(self.store.get_user_by_id('test456'))
+    
     def test_get_user_by_email(self):
         """Test retrieving user by email"""
         user_data = {
@@ -188,6 +215,16 @@ class TestInMemoryUserStore(unittest.TestCase):
         self.assertIsNotNone(retrieved)
         self.assertEqual(retrieved['email'], 'test@example.com')
     
+    def test_resave_email_under_new_id(self):
+        """Test that an email re-saved under a new ID drops the old ID"""
+        self.store.save_user({'user_id': 'old', 'email': 'test@example.com', 'password_hash': 'h', 'salt': 's'})
+        self.store.save_user({'user_id': 'new', 'email': 'test@example.com', 'password_hash': 'h', 'salt': 's'})
+        
+        self.assertIsNone(self.store.get_user_by_id('old'))
+        self.assertEqual(self.store.get_user_by_id('new')['user_id'], 'new')
+        self.assertTrue(self.store.delete_user('test@example.com'))
+        self.assertIsNone(self.store.get_user_by_id('new'))
+    
     def test_delete_user(self):
         """Test deleting user"""
         user_data = {
@@ -213,6 +250,16 @@ class TestInMemoryUserStore(unittest.TestCase):
         
         self.store.save_user(user2)
         self.assertEqual(self.store.get_user_count(), 2)
+    
+    def test_get_users_page(self):
+        """Test paging through users"""
+        for i in range(5):
+            self.store.save_user({'user_id': str(i), 'email': f'user{i}@test.com', 'password_hash': 'h', 'salt': 's'})
+        
+        page = self.store.get_users_page(offset=1, limit=2)
+        self.assertEqual([u['user_id'] for u in page], ['1', '2'])
+        self.assertEqual(self.store.get_users_page(offset=4, limit=10)[0]['user_id'], '4')
+        self.assertEqual(len(self.store.iter_users()), 5)
 
 
 class TestUserRegistrationSystem(unittest.TestCase):
@@ -261,6 +308,19 @@ class TestUserRegistrationSystem(unittest.TestCase):
         self.assertIn("Password validation failed", msg)
         self.assertIsNone(token)
     
+    def test_weak_password_skips_store(self):
+        """Test that a rejected password never reaches the user store"""
+        with patch.object(self.store, 'save_if_absent') as save, \
+                patch.object(self.store, 'check_duplicate') as check:
+            success, msg, token = self.system.register_user(
+                "user@example.com",
+                "weak"
+            )
+        
+        self.assertFalse(success)
+        save.assert_not_called()
+        check.assert_not_called()
+    
     def test_registration_duplicate_email(self):
         """Test registration with duplicate email"""
         # Register first user
@@ -328,6 +388,11 @@ class TestUserRegistrationSystem(unittest.TestCase):
         hash3, _ = self.system._hash_password(password, salt1)
         self.assertEqual(hash1, hash3)
     
+    def test_user_ids_unique(self):
+        """Test that generated user IDs are unique"""
+        ids = {self.system._new_user_id() for _ in range(1000)}
+        self.assertEqual(len(ids), 1000)
+    
     def test_authentication_success(self):
         """Test successful authentication"""
         email = "user@example.com"
@@ -382,6 +447,18 @@ class TestUserRegistrationSystem(unittest.TestCase):
         user = self.store.get_user_by_email("user@example.com")
         self.assertEqual(user['username'], "customuser")
     
+    def test_registration_stores_user_record(self):
+        """Test registered users are stored as UserRecord with dict-style access"""
+        self.system.register_user("user@example.com", "SecurePass123!")
+        
+        user = self.store.get_user_by_email("user@example.com")
+        self.assertIsInstance(user, UserRecord)
+        self.assertEqual(user['email'], user.email)
+        self.assertTrue(user.get('is_active'))
+        self.assertIsNone(user.get('missing'))
+        with self.assertRaises(KeyError):
+            user['missing']
+    
     def test_registration_auto_username(self):
         """Test registration with auto-generated username from email"""
         success, msg, token = self.system.register_user(
@@ -445,6 +522,62 @@ class TestFileBasedUserStore(unittest.TestCase):
         self.assertTrue(new_store.check_duplicate("test@example.com"))
         self.assertEqual(new_store.get_user_count(), 1)
 
+    
+    def test_changes_replayed_from_log(self):
+        """Test that logged changes survive reload and the log gets compacted"""
+        user1 = {'user_id': '1', 'email': 'user1@test.com', 'password_hash': 'h', 'salt': 's'}
+        user2 = {'user_id': '2', 'email': 'user2@test.com', 'password_hash': 'h', 'salt': 's'}
+        
+        self.store.save_user(user1)
+        self.store.save_user(user2)
+        self.assertTrue(os.path.exists(self.store.log_path))
+        
+        self.store.delete_user("user1@test.com")
+        
+        new_store = FileBasedUserStore(self.test_file)
+        self.assertEqual(new_store.get_user_count(), 1)
+        self.assertIsNone(new_store.get_user_by_id('1'))
+        
+        self.assertTrue(self.store.compact())
+        self.assertFalse(os.path.exists(self.store.log_path))
+        self.assertEqual(FileBasedUserStore(self.test_file).get_user_count(), 1)
+
+    def test_writes_after_torn_log_line_survive(self):
+        """Test that a torn log record is dropped instead of hiding later writes"""
+        user1 = {'user_id': '1', 'email': 'user1@test.com', 'password_hash': 'h', 'salt': 's'}
+        user2 = {'user_id': '2', 'email': 'user2@test.com', 'password_hash': 'h', 'salt': 's'}
+
+        self.store.save_user(user1)
+        self.store.close()
+        with open(self.store.log_path, 'ab') as f:
+            f.write(b'{"op":"put","email":"tor')
+
+        store = FileBasedUserStore(self.test_file)
+        self.assertEqual(store.get_user_count(), 1)
+        self.assertTrue(store.save_user(user2))
+        store.close()
+
+        reloaded = FileBasedUserStore(self.test_file)
+        self.assertIsNotNone(reloaded.get_user_by_email('user1@test.com'))
+        self.assertIsNotNone(reloaded.get_user_by_email('user2@test.com'))
+        reloaded.close()
+
+    def test_deferred_flush(self):
+        """Test that batched changes reach the file on flush"""
+        user_data = {
+            'user_id': 'test123',
+            'email': 'test@example.com',
+            'password_hash': 'hash',
+            'salt': 'salt'
+        }
+        
+        with FileBasedUserStore(self.test_file, flush_interval=60) as store:
+            store.save_user(user_data)
+            self.assertIsNone(FileBasedUserStore(self.test_file).get_user_by_email("test@example.com"))
+            
+            self.assertTrue(store.flush())
+            self.assertIsNotNone(FileBasedUserStore(self.test_file).get_user_by_email("test@example.com"))
+
 
 def run_tests():
     """Run all tests"""
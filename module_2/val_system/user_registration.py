@@ -4,19 +4,68 @@ Provides email validation, password requirements, duplicate checking, and JWT to
 """
 
 import re
+import json
+import string
+import time
+import base64
 import hashlib
+import hmac
 import secrets
-from datetime import datetime, timedelta
+import itertools
 from typing import Dict, Tuple, Optional
-import jwt
+
+try:
+    from .user_storage import SaveResult, UserRecord
+except ImportError:  # imported as a top-level module by scripts and tests
+    from user_storage import SaveResult, UserRecord
+
+
+def _b64url_encode(data: bytes) -> bytes:
+    """Base64url-encode without padding, as used by JWS"""
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    """Decode unpadded base64url data"""
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+# Encoded HS256 header, identical for every token we issue
+_JWT_HEADER = _b64url_encode(b'{"alg":"HS256","typ":"JWT"}')
+
+# (epoch second, ISO 8601 string) of the last formatted timestamp
+_last_timestamp = (0, '')
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time as an ISO 8601 string, formatted at most once per second"""
+    global _last_timestamp
+    now = int(time.time())
+    cached = _last_timestamp
+    if cached[0] != now:
+        cached = (now, time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)))
+        _last_timestamp = cached
+    return cached[1]
 
 
 class PasswordValidator:
     """Validates password requirements"""
     
+    __slots__ = ()
+    
     MIN_LENGTH = 8
     MAX_LENGTH = 128
     
+    # Length messages are formatted once instead of on every failed validation
+    TOO_SHORT_MESSAGE = f"Password must be at least {MIN_LENGTH} characters long"
+    TOO_LONG_MESSAGE = f"Password must not exceed {MAX_LENGTH} characters"
+    
+    # Character classes as sets, checked with C-level set operations
+    UPPERCASE_CHARS = frozenset(string.ascii_uppercase)
+    LOWERCASE_CHARS = frozenset(string.ascii_lowercase)
+    DIGIT_CHARS = frozenset(string.digits)
+    SPECIAL_CHARS = frozenset('!@#$%^&*(),.?":{}|<>')
+    
     @staticmethod
     def validate(password: str) -> Tuple[bool, str]:
         """
@@ -33,22 +82,26 @@ class PasswordValidator:
         if not password:
             return False, "Password cannot be empty"
         
-        if len(password) < PasswordValidator.MIN_LENGTH:
-            return False, f"Password must be at least {PasswordValidator.MIN_LENGTH} characters long"
+        length = len(password)
+        
+        if length < PasswordValidator.MIN_LENGTH:
+            return False, PasswordValidator.TOO_SHORT_MESSAGE
+        
+        if length > PasswordValidator.MAX_LENGTH:
+            return False, PasswordValidator.TOO_LONG_MESSAGE
         
-        if len(password) > PasswordValidator.MAX_LENGTH:
-            return False, f"Password must not exceed {PasswordValidator.MAX_LENGTH} characters"
+        chars = frozenset(password)
         
-        if not re.search(r'[A-Z]', password):
+        if PasswordValidator.UPPERCASE_CHARS.isdisjoint(chars):
             return False, "Password must contain at least one uppercase letter"
         
-        if not re.search(r'[a-z]', password):
+        if PasswordValidator.LOWERCASE_CHARS.isdisjoint(chars):
             return False, "Password must contain at least one lowercase letter"
         
-        if not re.search(r'\d', password):
+        if PasswordValidator.DIGIT_CHARS.isdisjoint(chars):
             return False, "Password must contain at least one digit"
         
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+        if PasswordValidator.SPECIAL_CHARS.isdisjoint(chars):
             return False, "Password must contain at least one special character (!@#$%^&*(),.?\":{}|<>)"
         
         return True, "Password is valid"
@@ -57,6 +110,11 @@ class PasswordValidator:
 class EmailValidator:
     """Validates email addresses"""
     
+    __slots__ = ()
+    
+    MAX_LENGTH = 254
+    MAX_LOCAL_LENGTH = 64  # RFC 5321
+    
     # RFC 5322 compliant email regex (simplified)
     EMAIL_REGEX = re.compile(
         r'^[a-zA-Z0-9.!#$%&\'*+/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$'
@@ -73,62 +131,98 @@ class EmailValidator:
         if not email:
             return False, "Email cannot be empty"
         
-        if len(email) > 254:
+        if len(email) > EmailValidator.MAX_LENGTH:
             return False, "Email address is too long"
         
+        # Cheap structural checks bound the work done by the regex
+        at_index = email.find('@')
+        
+        if at_index < 0 or email.find('@', at_index + 1) >= 0:
+            return False, "Email must contain exactly one @ symbol"
+        
+        if at_index == 0:
+            return False, "Email local part cannot be empty"
+        
+        if at_index > EmailValidator.MAX_LOCAL_LENGTH:
+            return False, "Email local part is too long"
+        
         if not EmailValidator.EMAIL_REGEX.match(email):
             return False, "Invalid email format"
         
         # Check for common typos
-        local_part, _, domain = email.partition('@')
-        
-        if not domain:
-            return False, "Email must contain @ symbol"
-        
         if '..' in email:
             return False, "Email cannot contain consecutive dots"
         
-        if not domain.count('.'):
+        if '.' not in email[at_index + 1:]:
             return False, "Email domain must contain at least one dot"
         
         return True, "Email is valid"
 
 
+# Module-level validator functions, called without per-instance indirection
+validate_email = EmailValidator.validate
+validate_password = PasswordValidator.validate
+
+
 class UserRegistrationSystem:
     """Main user registration system"""
     
+    __slots__ = ('user_store', 'jwt_secret', '_jwt_key', '_id_seed', '_id_counter')
+    
+    # scrypt cost parameters (~16 MiB memory per hash)
+    SCRYPT_N = 16384
+    SCRYPT_R = 8
+    SCRYPT_P = 1
+    
     def __init__(self, user_store, jwt_secret: Optional[str] = None):
         """
         Initialize registration system
         
         Args:
-            user_store: User storage instance (must implement check_duplicate and save_user methods)
+            user_store: User storage instance (must implement save_if_absent and get_user_by_email methods)
             jwt_secret: Secret key for JWT token generation (auto-generated if not provided)
         """
         self.user_store = user_store
         self.jwt_secret = jwt_secret or secrets.token_urlsafe(32)
-        self.email_validator = EmailValidator()
-        self.password_validator = PasswordValidator()
+        # HMAC key bytes, prepared once instead of per token
+        self._jwt_key = self.jwt_secret.encode('utf-8')
+        # One random seed per instance; user IDs are keyed hashes of a counter
+        self._id_seed = secrets.token_bytes(32)
+        self._id_counter = itertools.count()
+    
+    def _new_user_id(self) -> str:
+        """
+        Generate a unique, unpredictable user ID without a syscall per call
+        
+        Returns:
+            str: 24-character hex user ID
+        """
+        n = next(self._id_counter)
+        return hashlib.blake2b(n.to_bytes(8, 'little'), key=self._id_seed, digest_size=12).hexdigest()
     
-    def _hash_password(self, password: str, salt: Optional[str] = None) -> Tuple[str, str]:
+    def _hash_password(self, password: str, salt: Optional[str] = None) -> Tuple[bytes, str]:
         """
-        Hash password using SHA-256 with salt
+        Hash password using scrypt with salt
         
         Args:
             password: Plain text password
             salt: Salt for hashing (generated if not provided)
         
         Returns:
-            Tuple[str, str]: (hashed_password, salt)
+            Tuple[bytes, str]: (raw hash digest, salt)
         """
         if salt is None:
             salt = secrets.token_hex(16)
         
-        # Combine password and salt
-        salted_password = f"{password}{salt}"
-        
-        # Hash using SHA-256
-        hashed = hashlib.sha256(salted_password.encode()).hexdigest()
+        # scrypt takes the password and salt as bytes, no concatenation needed
+        hashed = hashlib.scrypt(
+            password.encode('utf-8'),
+            salt=salt.encode('ascii'),
+            n=self.SCRYPT_N,
+            r=self.SCRYPT_R,
+            p=self.SCRYPT_P,
+            dklen=32
+        )
         
         return hashed, salt
     
@@ -144,15 +238,21 @@ class UserRegistrationSystem:
         Returns:
             str: JWT token
         """
+        now = int(time.time())
         payload = {
             'user_id': user_id,
             'email': email,
-            'iat': datetime.utcnow(),
-            'exp': datetime.utcnow() + timedelta(hours=expiry_hours)
+            'iat': now,
+            'exp': now + expiry_hours * 3600
         }
         
-        token = jwt.encode(payload, self.jwt_secret, algorithm='HS256')
-        return token
+        # Build the compact JWS directly: header.payload.signature
+        signing_input = _JWT_HEADER + b'.' + _b64url_encode(
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        )
+        signature = hmac.new(self._jwt_key, signing_input, hashlib.sha256).digest()
+        
+        return (signing_input + b'.' + _b64url_encode(signature)).decode('ascii')
     
     def verify_jwt_token(self, token: str) -> Tuple[bool, Optional[Dict]]:
         """
@@ -165,12 +265,31 @@ class UserRegistrationSystem:
             Tuple[bool, Optional[Dict]]: (is_valid, payload)
         """
         try:
-            payload = jwt.decode(token, self.jwt_secret, algorithms=['HS256'])
-            return True, payload
-        except jwt.ExpiredSignatureError:
-            return False, {'error': 'Token has expired'}
-        except jwt.InvalidTokenError:
+            signing_input, _, signature = token.encode('ascii').rpartition(b'.')
+            header, _, payload_segment = signing_input.partition(b'.')
+            
+            if header != _JWT_HEADER:
+                return False, {'error': 'Invalid token'}
+            
+            expected = hmac.new(self._jwt_key, signing_input, hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, _b64url_decode(signature)):
+                return False, {'error': 'Invalid token'}
+            
+            payload = json.loads(_b64url_decode(payload_segment))
+        except (AttributeError, ValueError):
             return False, {'error': 'Invalid token'}
+        
+        if not isinstance(payload, dict):
+            return False, {'error': 'Invalid token'}
+        
+        exp = payload.get('exp')
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                return False, {'error': 'Invalid token'}
+            if exp <= time.time():
+                return False, {'error': 'Token has expired'}
+        
+        return True, payload
     
     def register_user(self, email: str, password: str, username: Optional[str] = None) -> Tuple[bool, str, Optional[str]]:
         """
@@ -185,19 +304,15 @@ class UserRegistrationSystem:
             Tuple[bool, str, Optional[str]]: (success, message, jwt_token)
         """
         # Validate email
-        email_valid, email_msg = self.email_validator.validate(email)
+        email_valid, email_msg = validate_email(email)
         if not email_valid:
             return False, f"Email validation failed: {email_msg}", None
         
-        # Normalize email to lowercase
-        email = email.lower().strip()
-        
-        # Check for duplicate email
-        if self.user_store.check_duplicate(email):
-            return False, "Email address already registered", None
+        # Normalize email once; the store uses it as its key
+        email = email.strip().lower()
         
         # Validate password
-        password_valid, password_msg = self.password_validator.validate(password)
+        password_valid, password_msg = validate_password(password)
         if not password_valid:
             return False, f"Password validation failed: {password_msg}", None
         
@@ -205,23 +320,26 @@ class UserRegistrationSystem:
         hashed_password, salt = self._hash_password(password)
         
         # Generate user ID
-        user_id = secrets.token_urlsafe(16)
+        user_id = self._new_user_id()
         
         # Create user record
-        user_data = {
-            'user_id': user_id,
-            'email': email,
-            'username': username or email.split('@')[0],
-            'password_hash': hashed_password,
-            'salt': salt,
-            'created_at': datetime.utcnow().isoformat(),
-            'is_active': True
-        }
-        
-        # Save user
-        save_success = self.user_store.save_user(user_data)
+        user_data = UserRecord(
+            user_id=user_id,
+            email=email,
+            username=username or email.split('@', 1)[0],
+            password_hash=hashed_password.hex(),
+            salt=salt,
+            created_at=_utc_timestamp(),
+            is_active=True
+        )
+        
+        # Save user; duplicate check and insert happen in one store call
+        result = self.user_store.save_if_absent(email, user_data)
+        
+        if result is SaveResult.DUPLICATE:
+            return False, "Email address already registered", None
         
-        if not save_success:
+        if result is not SaveResult.OK:
             return False, "Failed to save user to database", None
         
         # Generate JWT token
@@ -251,7 +369,8 @@ class UserRegistrationSystem:
         # Verify password
         hashed_input, _ = self._hash_password(password, user_data['salt'])
         
-        if hashed_input != user_data['password_hash']:
+        # Compare raw digests: half the bytes of the stored hex form
+        if not hmac.compare_digest(hashed_input, bytes.fromhex(user_data['password_hash'])):
             return False, "Invalid email or password", None
         
         if not user_data.get('is_active', True):
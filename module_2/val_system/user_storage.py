@@ -5,17 +5,122 @@ Provides in-memory and file-based storage for user data
 
 import json
 import os
-from typing import Dict, Optional, List
-from threading import Lock
+import atexit
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from enum import IntEnum
+from itertools import islice
+from typing import Dict, Optional, List, Tuple
+from threading import Lock, Timer
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib json module
+    orjson = None
+
+
+if orjson is not None:
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+else:
+    # Compact encoder shared by snapshot and log writes (json.dumps with custom
+    # separators would build a new encoder on every call)
+    def _encode_default(obj):
+        """Serialize UserRecord instances, which json can't encode natively"""
+        if isinstance(obj, UserRecord):
+            return obj.to_dict()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    
+    _ENCODER = json.JSONEncoder(separators=(',', ':'), default=_encode_default)
+    
+    def _dumps(obj) -> bytes:
+        """Serialize to compact UTF-8 JSON bytes"""
+        return _ENCODER.encode(obj).encode('utf-8')
+    
+    _loads = json.loads
+
+
+class SaveResult(IntEnum):
+    """Outcome of an atomic save_if_absent call"""
+    
+    OK = 0
+    DUPLICATE = 1
+    ERROR = 2
+
+
+@dataclass(slots=True)
+class UserRecord:
+    """
+    Stored user data
+    
+    Slotted fields take a fraction of the memory of a per-user dict. Records
+    also support item access (record['email'], record.get('is_active')), so
+    code written against plain user dicts keeps working, and both stores
+    accept either form.
+    """
+    
+    user_id: str
+    email: str
+    password_hash: str
+    salt: str
+    username: Optional[str] = None
+    created_at: Optional[str] = None
+    is_active: bool = True
+    
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __setitem__(self, key: str, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+    
+    def get(self, key: str, default=None):
+        """Get a field by name, or default if there is no such field"""
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def to_dict(self) -> Dict:
+        """Convert to a plain dict, e.g. for JSON serialization"""
+        return asdict(self)
 
 
 class InMemoryUserStore:
-    """In-memory user storage for testing and development"""
+    """
+    In-memory user storage for testing and development
+    
+    Single-key reads are plain dict lookups, each atomic under the GIL, so
+    they run without locking. Mutations lock only the stripe owning the
+    email, so writers for unrelated users never contend. Users are stored
+    once, keyed by email; IDs map to emails rather than to a second copy
+    of each record's dict slot.
+    """
+    
+    LOCK_STRIPES = 64  # must be a power of two
     
     def __init__(self):
         self.users = {}  # email -> user_data mapping
-        self.users_by_id = {}  # user_id -> user_data mapping
-        self.lock = Lock()
+        self.id_to_email = {}  # user_id -> email mapping
+        self.locks = tuple(Lock() for _ in range(self.LOCK_STRIPES))
+    
+    def _lock_for(self, email: str) -> Lock:
+        """Get the stripe lock guarding a normalized email"""
+        return self.locks[hash(email) & (self.LOCK_STRIPES - 1)]
+    
+    @contextmanager
+    def _all_locks(self):
+        """Hold every stripe lock, acquired in a fixed order"""
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self.locks):
+                lock.release()
     
     def check_duplicate(self, email: str) -> bool:
         """
@@ -27,8 +132,7 @@ class InMemoryUserStore:
         Returns:
             bool: True if email exists, False otherwise
         """
-        with self.lock:
-            return email.lower() in self.users
+        return email.lower() in self.users
     
     def save_user(self, user_data: Dict) -> bool:
         """
@@ -41,18 +145,48 @@ class InMemoryUserStore:
             bool: True if successful, False otherwise
         """
         try:
-            with self.lock:
-                email = user_data['email'].lower()
-                user_id = user_data['user_id']
-                
+            email = user_data['email'].lower()
+            user_id = user_data['user_id']
+            
+            with self._lock_for(email):
+                previous = self.users.get(email)
+                if previous is not None and previous['user_id'] != user_id:
+                    # The email now belongs to a new ID; the old one must not resolve to it
+                    self.id_to_email.pop(previous['user_id'], None)
                 self.users[email] = user_data
-                self.users_by_id[user_id] = user_data
+                self.id_to_email[user_id] = email
                 
             return True
         except Exception as e:
             print(f"Error saving user: {e}")
             return False
     
+    def save_if_absent(self, email: str, user_data: Dict) -> SaveResult:
+        """
+        Save user only if the email is not registered yet
+        
+        Args:
+            email: Normalized (lowercase) email address
+            user_data: User data dictionary
+        
+        Returns:
+            SaveResult: OK if saved, DUPLICATE if email already exists, ERROR on failure
+        """
+        try:
+            user_id = user_data['user_id']
+            
+            with self._lock_for(email):
+                # Single dict operation for both the duplicate check and the insert
+                if self.users.setdefault(email, user_data) is not user_data:
+                    return SaveResult.DUPLICATE
+                
+                self.id_to_email[user_id] = email
+            
+            return SaveResult.OK
+        except Exception as e:
+            print(f"Error saving user: {e}")
+            return SaveResult.ERROR
+    
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """
         Get user by email address
@@ -63,8 +197,7 @@ class InMemoryUserStore:
         Returns:
             Optional[Dict]: User data if found, None otherwise
         """
-        with self.lock:
-            return self.users.get(email.lower())
+        return self.users.get(email.lower())
     
     def get_user_by_id(self, user_id: str) -> Optional[Dict]:
         """
@@ -76,8 +209,7 @@ class InMemoryUserStore:
         Returns:
             Optional[Dict]: User data if found, None otherwise
         """
-        with self.lock:
-            return self.users_by_id.get(user_id)
+        return self.users.get(self.id_to_email.get(user_id))
     
     def get_all_users(self) -> List[Dict]:
         """
@@ -86,9 +218,33 @@ class InMemoryUserStore:
         Returns:
             List[Dict]: List of all user data
         """
-        with self.lock:
+        with self._all_locks():
             return list(self.users.values())
     
+    def iter_users(self) -> Tuple[Dict, ...]:
+        """
+        Get an immutable snapshot of all users to iterate over
+        
+        Returns:
+            Tuple[Dict, ...]: All user data
+        """
+        with self._all_locks():
+            return tuple(self.users.values())
+    
+    def get_users_page(self, offset: int = 0, limit: int = 100) -> List[Dict]:
+        """
+        Get one page of users without copying the whole store
+        
+        Args:
+            offset: Number of users to skip
+            limit: Maximum number of users to return
+        
+        Returns:
+            List[Dict]: Up to limit users, in registration order
+        """
+        with self._all_locks():
+            return list(islice(self.users.values(), offset, offset + limit))
+    
     def delete_user(self, email: str) -> bool:
         """
         Delete user by email
@@ -99,69 +255,258 @@ class InMemoryUserStore:
         Returns:
             bool: True if deleted, False if not found
         """
-        with self.lock:
-            email = email.lower()
+        email = email.lower()
+        
+        with self._lock_for(email):
             user_data = self.users.get(email)
             
             if user_data:
                 user_id = user_data['user_id']
                 del self.users[email]
-                del self.users_by_id[user_id]
+                del self.id_to_email[user_id]
                 return True
             
             return False
     
     def clear_all(self):
         """Clear all users from storage"""
-        with self.lock:
+        with self._all_locks():
             self.users.clear()
-            self.users_by_id.clear()
+            self.id_to_email.clear()
     
     def get_user_count(self) -> int:
         """Get total number of users"""
-        with self.lock:
-            return len(self.users)
+        return len(self.users)
 
 
 class FileBasedUserStore:
-    """File-based user storage for persistence"""
+    """
+    File-based user storage for persistence
+    
+    State is a JSON snapshot plus an append-only JSON Lines change log next to
+    it (``<file_path>.log``). Each change appends one log line; the log is
+    folded back into the snapshot once it outgrows the live user count.
+    """
     
-    def __init__(self, file_path: str = "users.json"):
+    LOG_BUFFER_SIZE = 64 * 1024
+    
+    def __init__(self, file_path: str = "users.json", flush_interval: Optional[float] = None):
         """
         Initialize file-based storage
         
         Args:
             file_path: Path to JSON file for storage
+            flush_interval: Seconds to batch changes before writing them in the
+                background (default: None, write every change immediately)
         """
         self.file_path = file_path
+        self.log_path = f"{file_path}.log"
+        self.flush_interval = flush_interval
         self.lock = Lock()
         self._initialize_file()
+        
+        # Parse the files once; reads are served from this in-memory index
+        self._data = self._load_data()
+        self._log_records = self._replay_log()
+        self._log = None
+        self._dirty = False
+        self._timer = None
+        
+        if flush_interval is not None:
+            atexit.register(self.flush)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def _initialize_file(self):
         """Initialize storage file if it doesn't exist"""
         if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w') as f:
-                json.dump({'users': {}, 'users_by_id': {}}, f)
+            with open(self.file_path, 'wb') as f:
+                f.write(_dumps({'users': {}, 'users_by_id': {}}))
     
     def _load_data(self) -> Dict:
         """Load data from file"""
         try:
-            with open(self.file_path, 'r') as f:
-                return json.load(f)
+            with open(self.file_path, 'rb') as f:
+                data = _loads(f.read())
+            data.setdefault('users', {})
+            data.setdefault('users_by_id', {})
+            return data
         except Exception as e:
             print(f"Error loading data: {e}")
             return {'users': {}, 'users_by_id': {}}
     
+    def _replay_log(self) -> int:
+        """
+        Apply the change log on top of the loaded snapshot
+        
+        Returns:
+            int: Number of log records applied
+        """
+        if not os.path.exists(self.log_path):
+            return 0
+        
+        users = self._data['users']
+        users_by_id = self._data['users_by_id']
+        count = 0
+        good_offset = 0
+        
+        with open(self.log_path, 'r+b') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("unterminated log record")
+                    record = _loads(line)
+                except ValueError:
+                    # Torn final write; everything before it is intact. Cut it
+                    # off so later appends don't land behind it and get skipped
+                    f.truncate(good_offset)
+                    break
+                
+                if record['op'] == 'put':
+                    user_data = record['data']
+                    users[record['email']] = user_data
+                    users_by_id[user_data['user_id']] = user_data
+                elif record['op'] == 'del':
+                    user_data = users.pop(record['email'], None)
+                    if user_data:
+                        users_by_id.pop(user_data['user_id'], None)
+                
+                count += 1
+                good_offset += len(line)
+        
+        return count
+    
     def _save_data(self, data: Dict) -> bool:
         """Save data to file"""
         try:
-            with open(self.file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Serialize up front so the file gets a single write call, and
+            # swap it in whole so a crash never leaves a half-written snapshot
+            payload = _dumps(data)
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
             return True
         except Exception as e:
             print(f"Error saving data: {e}")
             return False
     
+    def _append(self, record: Dict) -> bool:
+        """
+        Append one change to the log, then write it out now or schedule a flush
+        Must be called with the lock held
+        
+        Args:
+            record: Change record ({'op': 'put' | 'del', 'email': ..., 'data': ...})
+        
+        Returns:
+            bool: False if the change could not be written
+        """
+        try:
+            if self._log is None:
+                self._log = open(self.log_path, 'ab', buffering=self.LOG_BUFFER_SIZE)
+            self._log.write(_dumps(record) + b'\n')
+        except Exception as e:
+            print(f"Error saving data: {e}")
+            return False
+        
+        self._log_records += 1
+        
+        if self.flush_interval is None:
+            return self._flush_log()
+        
+        self._dirty = True
+        
+        if self._timer is None:
+            self._timer = Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+        
+        return True
+    
+    def _flush_log(self) -> bool:
+        """
+        Push buffered log lines to the file and compact an oversized log
+        Must be called with the lock held
+        """
+        try:
+            if self._log is not None:
+                self._log.flush()
+        except Exception as e:
+            print(f"Error saving data: {e}")
+            return False
+        
+        self._dirty = False
+        
+        if self._log_records > 2 * len(self._data['users']):
+            self._compact()
+        
+        return True
+    
+    def _compact(self) -> bool:
+        """
+        Rewrite the snapshot from memory and drop the change log
+        Must be called with the lock held
+        """
+        if not self._save_data(self._data):
+            return False
+        
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        
+        self._log_records = 0
+        self._dirty = False
+        return True
+    
+    def compact(self) -> bool:
+        """
+        Fold the change log into the JSON snapshot
+        
+        Returns:
+            bool: True if the snapshot was written
+        """
+        with self.lock:
+            return self._compact()
+    
+    def flush(self) -> bool:
+        """
+        Write pending changes to file if there are any
+        
+        Returns:
+            bool: True if the file is up to date
+        """
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            
+            if not self._dirty:
+                return True
+            
+            return self._flush_log()
+    
+    def close(self):
+        """Flush pending changes, stop background flushing and close the log"""
+        self.flush()
+        
+        with self.lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+        
+        if self.flush_interval is not None:
+            atexit.unregister(self.flush)
+    
     def check_duplicate(self, email: str) -> bool:
         """
         Check if email already exists
@@ -173,8 +518,7 @@ class FileBasedUserStore:
             bool: True if email exists, False otherwise
         """
         with self.lock:
-            data = self._load_data()
-            return email.lower() in data.get('users', {})
+            return email.lower() in self._data['users']
     
     def save_user(self, user_data: Dict) -> bool:
         """
@@ -187,7 +531,7 @@ class FileBasedUserStore:
             bool: True if successful, False otherwise
         """
         with self.lock:
-            data = self._load_data()
+            data = self._data
             
             email = user_data['email'].lower()
             user_id = user_data['user_id']
@@ -195,7 +539,36 @@ class FileBasedUserStore:
             data['users'][email] = user_data
             data['users_by_id'][user_id] = user_data
             
-            return self._save_data(data)
+            return self._append({'op': 'put', 'email': email, 'data': user_data})
+    
+    def save_if_absent(self, email: str, user_data: Dict) -> SaveResult:
+        """
+        Save user only if the email is not registered yet
+        
+        Args:
+            email: Normalized (lowercase) email address
+            user_data: User data dictionary
+        
+        Returns:
+            SaveResult: OK if saved, DUPLICATE if email already exists, ERROR on failure
+        """
+        with self.lock:
+            data = self._data
+            
+            if email in data['users']:
+                return SaveResult.DUPLICATE
+            
+            user_id = user_data['user_id']
+            data['users'][email] = user_data
+            data['users_by_id'][user_id] = user_data
+            
+            if not self._append({'op': 'put', 'email': email, 'data': user_data}):
+                # Keep memory consistent with the file
+                del data['users'][email]
+                del data['users_by_id'][user_id]
+                return SaveResult.ERROR
+            
+            return SaveResult.OK
     
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """
@@ -208,8 +581,7 @@ class FileBasedUserStore:
             Optional[Dict]: User data if found, None otherwise
         """
         with self.lock:
-            data = self._load_data()
-            return data.get('users', {}).get(email.lower())
+            return self._data['users'].get(email.lower())
     
     def get_user_by_id(self, user_id: str) -> Optional[Dict]:
         """
@@ -222,8 +594,7 @@ class FileBasedUserStore:
             Optional[Dict]: User data if found, None otherwise
         """
         with self.lock:
-            data = self._load_data()
-            return data.get('users_by_id', {}).get(user_id)
+            return self._data['users_by_id'].get(user_id)
     
     def get_all_users(self) -> List[Dict]:
         """
@@ -233,8 +604,31 @@ class FileBasedUserStore:
             List[Dict]: List of all user data
         """
         with self.lock:
-            data = self._load_data()
-            return list(data.get('users', {}).values())
+            return list(self._data['users'].values())
+    
+    def iter_users(self) -> Tuple[Dict, ...]:
+        """
+        Get an immutable snapshot of all users to iterate over
+        
+        Returns:
+            Tuple[Dict, ...]: All user data
+        """
+        with self.lock:
+            return tuple(self._data['users'].values())
+    
+    def get_users_page(self, offset: int = 0, limit: int = 100) -> List[Dict]:
+        """
+        Get one page of users without copying the whole store
+        
+        Args:
+            offset: Number of users to skip
+            limit: Maximum number of users to return
+        
+        Returns:
+            List[Dict]: Up to limit users, in registration order
+        """
+        with self.lock:
+            return list(islice(self._data['users'].values(), offset, offset + limit))
     
     def delete_user(self, email: str) -> bool:
         """
@@ -247,26 +641,26 @@ class FileBasedUserStore:
             bool: True if deleted, False if not found
         """
         with self.lock:
-            data = self._load_data()
+            data = self._data
             email = email.lower()
             
-            user_data = data.get('users', {}).get(email)
+            user_data = data['users'].get(email)
             
             if user_data:
                 user_id = user_data['user_id']
                 del data['users'][email]
                 del data['users_by_id'][user_id]
-                return self._save_data(data)
+                return self._append({'op': 'del', 'email': email})
             
             return False
     
     def clear_all(self):
         """Clear all users from storage"""
         with self.lock:
-            self._save_data({'users': {}, 'users_by_id': {}})
+            self._data = {'users': {}, 'users_by_id': {}}
+            self._compact()
     
     def get_user_count(self) -> int:
         """Get total number of users"""
         with self.lock:
-            data = self._load_data()
-            return len(data.get('users', {}))
+            return len(self._data['users'])
@@ -1,10 +1,13 @@
 """
 Authentication functions with rate limiting and credential verification.
 """
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional, Tuple
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from models import User
+import bcrypt
 import time
 
 
@@ -13,8 +16,16 @@ class RateLimiter:
     Rate limiter to prevent brute force attacks.
     
     Tracks login attempts by username/IP and enforces cooldown periods.
+    Entries live in two generations that rotate once per lockout duration,
+    so idle usernames are dropped in O(1) without scanning the cache.
+    
+    It also keeps a short-lived copy of the password hash for usernames
+    that are failing to log in, so repeated attempts skip the user query.
     """
     
+    USER_CACHE_SIZE = 1024
+    USER_CACHE_TTL_SECONDS = 60
+    
     def __init__(self, max_attempts=5, lockout_duration_minutes=15):
         """
         Initialize rate limiter.
@@ -25,7 +36,47 @@ class RateLimiter:
         """
         self.max_attempts = max_attempts
         self.lockout_duration = timedelta(minutes=lockout_duration_minutes)
-        self.attempt_cache = {}  # {username: {'attempts': int, 'locked_until': datetime}}
+        # {username: {'attempts': int, 'locked_until': datetime}}
+        self._current = {}
+        self._previous = {}
+        self._window_seconds = self.lockout_duration.total_seconds()
+        self._window_start = time.monotonic()
+        # {username: (expires_at, user_id, password_hash_bytes)}, oldest first
+        self._user_cache = OrderedDict()
+    
+    def _rotate(self):
+        """
+        Start a new generation once the current window has elapsed.
+        
+        An entry survives at least one full window after its last use,
+        which is never shorter than its lockout.
+        """
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        
+        if elapsed >= self._window_seconds:
+            self._previous = self._current if elapsed < 2 * self._window_seconds else {}
+            self._current = {}
+            self._window_start = now
+    
+    def _get_entry(self, username: str) -> Optional[dict]:
+        """
+        Look up a username, pulling entries from the previous generation forward.
+        
+        Args:
+            username: Username to look up
+            
+        Returns:
+            Cache entry or None if the username has no recorded attempts
+        """
+        entry = self._current.get(username)
+        
+        if entry is None:
+            entry = self._previous.pop(username, None)
+            if entry is not None:
+                self._current[username] = entry
+        
+        return entry
     
     def is_locked_out(self, username: str) -> Tuple[bool, Optional[int]]:
         """
@@ -37,10 +88,12 @@ class RateLimiter:
         Returns:
             Tuple of (is_locked, seconds_remaining)
         """
-        if username not in self.attempt_cache:
+        self._rotate()
+        cache_entry = self._get_entry(username)
+        
+        if cache_entry is None:
             return False, None
         
-        cache_entry = self.attempt_cache[username]
         locked_until = cache_entry.get('locked_until')
         
         if locked_until and datetime.utcnow() < locked_until:
@@ -49,7 +102,7 @@ class RateLimiter:
         
         # Lockout expired, clean up
         if locked_until and datetime.utcnow() >= locked_until:
-            del self.attempt_cache[username]
+            del self._current[username]
             return False, None
         
         return False, None
@@ -61,15 +114,16 @@ class RateLimiter:
         Args:
             username: Username that failed to login
         """
-        if username not in self.attempt_cache:
-            self.attempt_cache[username] = {'attempts': 0, 'locked_until': None}
+        self._rotate()
+        cache_entry = self._get_entry(username)
         
-        self.attempt_cache[username]['attempts'] += 1
+        if cache_entry is None:
+            cache_entry = self._current[username] = {'attempts': 0, 'locked_until': None}
         
-        if self.attempt_cache[username]['attempts'] >= self.max_attempts:
-            self.attempt_cache[username]['locked_until'] = (
-                datetime.utcnow() + self.lockout_duration
-            )
+        cache_entry['attempts'] += 1
+        
+        if cache_entry['attempts'] >= self.max_attempts:
+            cache_entry['locked_until'] = datetime.utcnow() + self.lockout_duration
     
     def reset_attempts(self, username: str):
         """
@@ -78,14 +132,78 @@ class RateLimiter:
         Args:
             username: Username to reset
         """
-        if username in self.attempt_cache:
-            del self.attempt_cache[username]
+        self._current.pop(username, None)
+        self._previous.pop(username, None)
+        self._user_cache.pop(username, None)
+    
+    def cache_user(self, username: str, user: User):
+        """
+        Remember a user's id and password hash for a short time.
+        
+        Args:
+            username: Username the user was looked up by
+            user: User row to cache (the plaintext password is never stored)
+        """
+        self._user_cache[username] = (
+            time.monotonic() + self.USER_CACHE_TTL_SECONDS,
+            user.id,
+            user.password_hash.encode('utf-8'),
+        )
+        self._user_cache.move_to_end(username)
+        if len(self._user_cache) > self.USER_CACHE_SIZE:
+            self._user_cache.popitem(last=False)
+    
+    def forget_user(self, username: str):
+        """
+        Drop a cached password hash that no longer matches the database.
+        
+        Args:
+            username: Username to forget
+        """
+        self._user_cache.pop(username, None)
+    
+    def get_cached_user(self, username: str) -> Optional[Tuple[int, bytes]]:
+        """
+        Look up a cached user id and password hash.
+        
+        Args:
+            username: Username to look up
+            
+        Returns:
+            Tuple of (user_id, password_hash) or None if missing or expired
+        """
+        entry = self._user_cache.get(username)
+        if entry is None:
+            return None
+        
+        expires_at, user_id, password_hash = entry
+        if expires_at <= time.monotonic():
+            del self._user_cache[username]
+            return None
+        
+        return user_id, password_hash
 
 
 # Global rate limiter instance
 rate_limiter = RateLimiter(max_attempts=5, lockout_duration_minutes=15)
 
 
+_dummy_password_hash = None
+
+
+def _dummy_password_check(password: str) -> None:
+    """
+    Run a bcrypt check against a throwaway hash.
+    
+    Brute force is throttled by the rate limiter and bcrypt's own cost, so
+    failed logins no longer sleep and tie up a worker thread.
+    """
+    global _dummy_password_hash
+    if _dummy_password_hash is None:
+        _dummy_password_hash = bcrypt.hashpw(b'dummy-password', bcrypt.gensalt(rounds=12))
+    bcrypt.checkpw(password.encode('utf-8'), _dummy_password_hash)
+
+
 def login(db_session: Session, username: str, password: str) -> Tuple[bool, str, Optional[User]]:
     """
     Authenticate user credentials with rate limiting.
@@ -112,27 +230,65 @@ def login(db_session: Session, username: str, password: str) -> Tuple[bool, str,
             None
         )
     
-    # Query user from database
-    user = db_session.query(User).filter_by(username=username).first()
-    
-    if not user:
-        # Record failed attempt even if user doesn't exist (prevent enumeration)
-        rate_limiter.record_failed_attempt(username)
-        time.sleep(0.5)  # Slight delay to slow down brute force
-        return False, "Invalid username or password.", None
+    cached = rate_limiter.get_cached_user(username)
+    user = None
     
-    # Check if account is active
-    if not user.is_active:
-        return False, "Account is disabled. Contact support.", None
+    if cached is not None:
+        # Username failed recently: verify against the cached hash. It is only
+        # trusted while it still matches the stored one and the account is
+        # active, so a password change or disabled account since it was
+        # cached falls through to the full check below
+        user_id, password_hash = cached
+        if bcrypt.checkpw(password.encode('utf-8'), password_hash):
+            user = db_session.get(User, user_id)
+            if user is None or user.password_hash.encode('utf-8') != password_hash:
+                user = None
+        else:
+            updated = db_session.query(User).filter(
+                User.id == user_id,
+                User.password_hash == password_hash.decode('utf-8'),
+                User.is_active.is_(True)
+            ).update(
+                {
+                    User.failed_login_attempts: User.failed_login_attempts + 1,
+                    User.last_failed_login: datetime.utcnow(),
+                },
+                synchronize_session=False
+            )
+            if updated:
+                rate_limiter.record_failed_attempt(username)
+                db_session.commit()
+                return False, "Invalid username or password.", None
+        
+        if user is None:
+            rate_limiter.forget_user(username)
+        elif not user.is_active:
+            return False, "Account is disabled. Contact support.", None
     
-    # Verify password
-    if not user.check_password(password):
-        # Record failed attempt
-        rate_limiter.record_failed_attempt(username)
-        user.increment_failed_attempts()
-        db_session.commit()
-        time.sleep(0.5)  # Slight delay to slow down brute force
-        return False, "Invalid username or password.", None
+    if user is None:
+        # Query user from database
+        user = db_session.query(User).filter_by(username=username).first()
+        
+        if not user:
+            # Record failed attempt even if user doesn't exist (prevent enumeration)
+            rate_limiter.record_failed_attempt(username)
+            # Spend the same bcrypt work as a real check so timing doesn't reveal
+            # whether the username exists
+            _dummy_password_check(password)
+            return False, "Invalid username or password.", None
+        
+        # Check if account is active
+        if not user.is_active:
+            return False, "Account is disabled. Contact support.", None
+        
+        # Verify password
+        if not user.check_password(password):
+            # Record failed attempt
+            rate_limiter.record_failed_attempt(username)
+            rate_limiter.cache_user(username, user)
+            user.increment_failed_attempts()
+            db_session.commit()
+            return False, "Invalid username or password.", None
     
     # Successful login
     rate_limiter.reset_attempts(username)
@@ -162,14 +318,17 @@ def register_user(db_session: Session, username: str, email: str, password: str)
     if len(password) < 8:
         return False, "Password must be at least 8 characters long.", None
     
-    # Check if username already exists
-    existing_user = db_session.query(User).filter_by(username=username).first()
-    if existing_user:
+    # Check username and email in one query (at most one row can match each)
+    existing = (
+        db_session.query(User.username)
+        .filter(or_(User.username == username, User.email == email))
+        .limit(2)
+        .all()
+    )
+    if any(row.username == username for row in existing):
         return False, "Username already taken.", None
     
-    # Check if email already exists
-    existing_email = db_session.query(User).filter_by(email=email).first()
-    if existing_email:
+    if existing:
         return False, "Email already registered.", None
     
     # Create new user
@@ -1,9 +1,24 @@
+try:
+    import numpy as np
+except ImportError:  # only needed by calculate_order_total_batch
+    np = None
+
+
 # Example 1
 def calculate_order_total(items, tax_rate):
     subtotal = sum(item['price'] * item['quantity'] for item in items)
     tax = subtotal * tax_rate
     return {'subtotal': subtotal, 'tax': tax, 'total': subtotal + tax}
 
+# Same totals for large batches kept as parallel price/quantity arrays,
+# summed in NumPy instead of looping over item dicts
+def calculate_order_total_batch(prices, quantities, tax_rate):
+    if np is None:
+        raise ImportError("calculate_order_total_batch requires numpy")
+    subtotal = float(np.dot(np.asarray(prices, dtype=float), np.asarray(quantities, dtype=float)))
+    tax = subtotal * tax_rate
+    return {'subtotal': subtotal, 'tax': tax, 'total': subtotal + tax}
+
 # Example 2
 def calculate_shipping_cost(weight, distance, priority):
     base_cost = weight * 0.5
@@ -17,24 +32,14 @@ def calculate_shipping_cost(weight, distance, priority):
 
 # Create a similar function for:
 # calculate_discount(items, loyalty_level, coupon_code)
+LOYALTY_DISCOUNTS = {'gold': 0.20, 'silver': 0.10}
+COUPON_DISCOUNTS = {'SAVE10': 0.10, 'SAVE20': 0.20}
+
 def calculate_discount(items, loyalty_level, coupon_code):
     subtotal = sum(item['price'] * item['quantity'] for item in items)
     
-    # Loyalty discount
-    if loyalty_level == 'gold':
-        loyalty_discount = 0.20
-    elif loyalty_level == 'silver':
-        loyalty_discount = 0.10
-    else:
-        loyalty_discount = 0.0
-    
-    # Coupon discount
-    if coupon_code == 'SAVE10':
-        coupon_discount = 0.10
-    elif coupon_code == 'SAVE20':
-        coupon_discount = 0.20
-    else:
-        coupon_discount = 0.0
+    loyalty_discount = LOYALTY_DISCOUNTS.get(loyalty_level, 0.0)
+    coupon_discount = COUPON_DISCOUNTS.get(coupon_code, 0.0)
     
     total_discount_rate = loyalty_discount + coupon_discount
     total_discount = subtotal * total_discount_rate
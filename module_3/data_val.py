@@ -1,12 +1,13 @@
-
 # EXERCISE 2: zero shot
 # Create a function to validate phone numbers
 # Support: US format (XXX) XXX-XXXX or XXX-XXX-XXXX
+# (the few-shot version at the bottom of this file is the one in use)
 import re
-def validate_phone_number(phone):
-    """Validate US phone number format."""
-    pattern = r'^(\(\d{3}\) \d{3}-\d{4}|\d{3}-\d{3}-\d{4})$'
-    return re.match(pattern, phone) is not None
+
+# Patterns are compiled once at import instead of looked up on every call
+PHONE_PATTERN = re.compile(r'^(\(\d{3}\) \d{3}-\d{4}|\d{3}-\d{3}-\d{4})$')
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+ZIP_CODE_PATTERN = re.compile(r'^\d{5}(-\d{4})?$')
 
 
 # FEW SHOT EXERCISE
@@ -14,22 +15,19 @@ def validate_phone_number(phone):
 
 def validate_email(email):
     """Validate email format."""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(pattern, email):
+    if not EMAIL_PATTERN.match(email):
         return False, "Invalid email format"
     return True, email
 
 def validate_zip_code(zip_code):
     """Validate US zip code (5 digits or 5+4 format)."""
-    pattern = r'^\d{5}(-\d{4})?$'
-    if not re.match(pattern, zip_code):
+    if not ZIP_CODE_PATTERN.match(zip_code):
         return False, "Invalid zip code format"
     return True, zip_code
 
 # Now create validator for phone numbers: (XXX) XXX-XXXX or XXX-XXX-XXXX
 def validate_phone_number(phone):
     """Validate US phone number format."""
-    pattern = r'^(\(\d{3}\) \d{3}-\d{4}|\d{3}-\d{3}-\d{4})$'
-    if not re.match(pattern, phone):
+    if not PHONE_PATTERN.match(phone):
         return False, "Invalid phone number format"
     return True, phone
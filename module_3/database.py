@@ -1,11 +1,35 @@
 """
 Database configuration and session management.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool
 from models import Base
 
 
+def _is_in_memory_sqlite(database_url):
+    """Return True for SQLite URLs that point at an in-memory database."""
+    return database_url.startswith('sqlite') and (
+        database_url.rstrip('/') in ('sqlite:', 'sqlite+pysqlite:') or ':memory:' in database_url
+    )
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune each new SQLite connection for write throughput.
+    
+    WAL lets readers run alongside a writer, and synchronous=NORMAL skips the
+    per-commit fsync of the main database file (still safe under WAL).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-64000")  # ~64 MB page cache
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
 class Database:
     """
     Database connection manager.
@@ -18,11 +42,25 @@ class Database:
         Args:
             database_url: SQLAlchemy database URL
         """
+        engine_options = {}
+        if not _is_in_memory_sqlite(database_url):
+            # Let concurrent sessions each hold their own connection; an
+            # in-memory SQLite database only exists on a single connection,
+            # so it keeps SQLAlchemy's default pool
+            engine_options.update(
+                poolclass=QueuePool,
+                pool_size=8,
+                max_overflow=16,
+                pool_pre_ping=True,
+            )
         self.engine = create_engine(
             database_url,
             echo=False,  # Set to True for SQL query logging
-            connect_args={'check_same_thread': False} if 'sqlite' in database_url else {}
+            connect_args={'check_same_thread': False} if 'sqlite' in database_url else {},
+            **engine_options
         )
+        if database_url.startswith('sqlite'):
+            event.listen(self.engine, 'connect', _set_sqlite_pragmas)
         self.SessionLocal = scoped_session(sessionmaker(
             autocommit=False,
             autoflush=False,
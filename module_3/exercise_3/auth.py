@@ -3,17 +3,33 @@ Authentication logic for user management.
 """
 
 import hashlib
+import hmac
+from functools import lru_cache
 from user import User
 
 # In-memory user storage (for practice purposes)
 users_db = {}
 
+# Memoize password hashes during authentication. Off by default because the
+# cache keeps recently tried plaintext passwords in memory as its keys.
+CACHE_PASSWORD_HASHES = False
+
 
 def hash_password(password):
     """Hash a password using SHA-256."""
     return hashlib.sha256(password.encode()).hexdigest()
 
 
+# Stand-in digest compared against when the username doesn't exist
+_DUMMY_PASSWORD_HASH = hash_password('')
+
+
+@lru_cache(maxsize=128)
+def _cached_hash_password(password):
+    """Memoized hash_password for repeated authentication attempts."""
+    return hash_password(password)
+
+
 def register_user(username, email, password):
     """
     Register a new user in the system.
@@ -45,9 +61,16 @@ def authenticate_user(username, password):
         User or None: User object if authenticated, None otherwise
     """
     user = users_db.get(username)
-    password_hash = hash_password(password)
+    hasher = _cached_hash_password if CACHE_PASSWORD_HASHES else hash_password
+    password_hash = hasher(password)
+    
+    if user is None:
+        # Compare against a fixed digest so unknown usernames take as long
+        # as wrong passwords
+        hmac.compare_digest(_DUMMY_PASSWORD_HASH, password_hash)
+        return None
     
-    if user.password_hash == password_hash and user.is_active:
+    if hmac.compare_digest(user.password_hash, password_hash) and user.is_active:
         return user
     return None
 
@@ -4,35 +4,173 @@ Based on context-rich prompt: RESTful API endpoint for task management
 with validation, authentication, CORS, and comprehensive error handling.
 """
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+from flask import Flask, request, jsonify, Response
+from werkzeug.exceptions import RequestEntityTooLarge
 from functools import wraps
 from datetime import datetime
+from collections import OrderedDict
+import hashlib
+import itertools
+import re
+import threading
+import time
 import jwt
 import logging
 from typing import Dict, Optional
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:  # optional; falls back to Flask's jsonify
+    orjson = None
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    import uvicorn
+except ImportError:  # optional; falls back to Flask's development server
+    WsgiToAsgi = None
+    uvicorn = None
+
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
-CORS(app)
+# Reject larger bodies before they are read or parsed
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024
+
+# ASGI entry point for uvicorn (``uvicorn api_endpoint:asgi_app``)
+asgi_app = WsgiToAsgi(app) if WsgiToAsgi is not None else None
+
+# CORS policy is the same for every route, so the headers are built once
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Authorization, Content-Type',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+}
+
+
+@app.before_request
+def handle_preflight():
+    """Answer CORS preflight requests before any route handler runs."""
+    if request.method == 'OPTIONS':
+        return '', 204
+
+
+@app.after_request
+def add_cors_headers(response):
+    """Attach the static CORS headers to every response."""
+    response.headers.update(CORS_HEADERS)
+    return response
+
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(name)s:%(message)s')
 logger = logging.getLogger(__name__)
 
 
+def json_response(payload, status: int = 200) -> Response:
+    """Build a JSON response, serialized with orjson when it is installed."""
+    if orjson is None:
+        response = jsonify(payload)
+        response.status_code = status
+        return response
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
+
+
+def read_json_body():
+    """Parse the request's JSON body, with orjson when it is installed.
+    
+    Returns None if the body is not JSON or is malformed.
+    """
+    if not request.is_json:
+        return None
+    if orjson is None:
+        return request.get_json(silent=True)
+    try:
+        return orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return None
+
+
 class Priority(Enum):
     LOW = "low"
     MEDIUM = "medium"
     HIGH = "high"
 
 
+# Task payload constraints, resolved once at import rather than per request
+TITLE_MAX_LENGTH = 100
+DESCRIPTION_MAX_LENGTH = 500
+VALID_PRIORITIES = frozenset(p.value for p in Priority)
+PRIORITY_ERROR = f"Priority must be one of: {', '.join(p.value for p in Priority)}"
+# Date, or date and time with optional seconds, fraction and UTC offset
+ISO_DATETIME_PATTERN = re.compile(
+    r'\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?(?:Z|[+-]\d{2}:\d{2})?)?'
+)
+
+
 # Simulated database
 tasks_db = []
 users_db = {1: "John Doe", 2: "Jane Smith"}
-task_id_counter = 1
+task_ids = itertools.count(1)  # next() is atomic, so no global counter or lock
+
+# Successfully verified tokens, so clients reusing a bearer token skip the
+# signature check: {blake2b(token): (payload, expires_at)}, oldest first
+JWT_CACHE_SIZE = 10000
+JWT_CACHE_TTL_SECONDS = 30
+_jwt_cache = OrderedDict()
+_jwt_cache_lock = threading.Lock()
+
+
+# (epoch second, ISO 8601 string) of the last formatted timestamp
+_last_timestamp = (0, '')
+
+
+def utc_timestamp() -> str:
+    """Current UTC time as an ISO 8601 string, formatted at most once per second."""
+    global _last_timestamp
+    now = int(time.time())
+    cached = _last_timestamp
+    if cached[0] != now:
+        cached = (now, time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)))
+        _last_timestamp = cached
+    return cached[1]
+
+
+def decode_token(token: str) -> Dict:
+    """Decode and verify a JWT, reusing recent successful verifications.
+    
+    Entries never outlive the token's own ``exp`` claim, so expired tokens
+    still reach ``jwt.decode`` and raise ``ExpiredSignatureError``. Failed
+    verifications are not cached.
+    
+    Raises:
+        jwt.InvalidTokenError: If the token is invalid or expired
+    """
+    token_bytes = token.encode()
+    key = hashlib.blake2b(token_bytes, digest_size=16).digest()
+    now = time.time()
+    
+    with _jwt_cache_lock:
+        entry = _jwt_cache.get(key)
+        if entry is not None:
+            payload, expires_at = entry
+            if now < expires_at:
+                return payload
+            del _jwt_cache[key]
+    
+    payload = jwt.decode(token_bytes, app.config['SECRET_KEY'], algorithms=['HS256'])
+    
+    expires_at = now + JWT_CACHE_TTL_SECONDS
+    exp = payload.get('exp')
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, exp)
+    
+    with _jwt_cache_lock:
+        _jwt_cache[key] = (payload, expires_at)
+        if len(_jwt_cache) > JWT_CACHE_SIZE:
+            _jwt_cache.popitem(last=False)
+    
+    return payload
 
 
 def require_auth(f):
@@ -43,25 +181,39 @@ def require_auth(f):
         
         if not token:
             logger.warning(f"Unauthorized access attempt from {request.remote_addr}")
-            return jsonify({'error': 'Authorization token required'}), 401
+            return json_response({'error': 'Authorization token required'}, 401)
         
         try:
             # Remove 'Bearer ' prefix if present
-            if token.startswith('Bearer '):
-                token = token[7:]
+            token = token.removeprefix('Bearer ')
             
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            data = decode_token(token)
             request.user_id = data.get('user_id')
         except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token has expired'}), 401
+            return json_response({'error': 'Token has expired'}, 401)
         except jwt.InvalidTokenError:
-            return jsonify({'error': 'Invalid token'}), 401
+            return json_response({'error': 'Invalid token'}, 401)
         
         return f(*args, **kwargs)
     
     return decorated
 
 
+def is_iso_datetime(value) -> bool:
+    """Check that a value is an ISO 8601 date or datetime string.
+    
+    The regex rejects malformed strings without raising; only strings of the
+    right shape are parsed, to catch out-of-range fields such as month 13.
+    """
+    if not isinstance(value, str) or not ISO_DATETIME_PATTERN.fullmatch(value):
+        return False
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return False
+    return True
+
+
 def validate_task_input(data: Dict) -> tuple[Optional[Dict], Optional[str]]:
     """Validate task input data.
     
@@ -74,27 +226,23 @@ def validate_task_input(data: Dict) -> tuple[Optional[Dict], Optional[str]]:
     title = data.get('title', '').strip()
     if not title:
         errors.append("Title is required")
-    elif len(title) > 100:
-        errors.append("Title must not exceed 100 characters")
+    elif len(title) > TITLE_MAX_LENGTH:
+        errors.append(f"Title must not exceed {TITLE_MAX_LENGTH} characters")
 
     # Validate description (optional, max 500 chars)
     description = data.get('description', '').strip()
-    if description and len(description) > 500:
-        errors.append("Description must not exceed 500 characters")
+    if len(description) > DESCRIPTION_MAX_LENGTH:
+        errors.append(f"Description must not exceed {DESCRIPTION_MAX_LENGTH} characters")
 
     # Validate due_date (optional, ISO format)
     due_date = data.get('due_date')
-    if due_date:
-        try:
-            datetime.fromisoformat(due_date.replace('Z', '+00:00'))
-        except (ValueError, AttributeError):
-            errors.append("Invalid due_date format. Use ISO 8601 format")
+    if due_date and not is_iso_datetime(due_date):
+        errors.append("Invalid due_date format. Use ISO 8601 format")
 
     # Validate priority (enum)
     priority = data.get('priority', 'medium').lower()
-    valid_priorities = [p.value for p in Priority]
-    if priority not in valid_priorities:
-        errors.append(f"Priority must be one of: {', '.join(valid_priorities)}")
+    if priority not in VALID_PRIORITIES:
+        errors.append(PRIORITY_ERROR)
 
     # Validate assigned_user_id (must exist)
     assigned_user_id = data.get('assigned_user_id')
@@ -135,50 +283,50 @@ def create_task():
         401: Unauthorized
         500: Server error
     """
-    global task_id_counter
-    
     # Log request
-    logger.info(f"Task creation request from user {request.user_id} at {datetime.utcnow()}")
+    logger.info(f"Task creation request from user {request.user_id}")
     
     try:
         # Get JSON data
-        data = request.get_json()
+        data = read_json_body()
         if not data:
-            return jsonify({'error': 'Request body must be JSON'}), 400
+            return json_response({'error': 'Request body must be JSON'}, 400)
         
         # Validate input
         validated_data, error = validate_task_input(data)
         if error:
             logger.warning(f"Validation error: {error}")
-            return jsonify({'error': error}), 400
+            return json_response({'error': error}, 400)
         
         # Create task
+        now = utc_timestamp()
         task = {
-            'id': task_id_counter,
+            'id': next(task_ids),
             'title': validated_data['title'],
             'description': validated_data['description'],
             'due_date': validated_data['due_date'],
             'priority': validated_data['priority'],
             'assigned_user_id': validated_data['assigned_user_id'],
             'created_by': request.user_id,
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
+            'created_at': now,
+            'updated_at': now
         }
         
         tasks_db.append(task)
-        task_id_counter += 1
         
         logger.info(f"Task {task['id']} created successfully")
         
         # Return created task with 201 status
-        return jsonify({
+        return json_response({
             'message': 'Task created successfully',
             'task': task
-        }), 201
+        }, 201)
     
+    except RequestEntityTooLarge:
+        return json_response({'error': 'Payload too large'}, 413)
     except Exception as e:
         logger.error(f"Server error during task creation: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return json_response({'error': 'Internal server error'}, 500)
 
 
 @app.route('/api/tasks', methods=['GET'])
@@ -186,13 +334,13 @@ def create_task():
 def get_tasks():
     """Get all tasks for authenticated user."""
     logger.info(f"Task list request from user {request.user_id}")
-    return jsonify({'tasks': tasks_db}), 200
+    return json_response({'tasks': tasks_db}, 200)
 
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()}), 200
+    return json_response({'status': 'healthy', 'timestamp': utc_timestamp()}, 200)
 
 
 if __name__ == '__main__':
@@ -209,4 +357,7 @@ if __name__ == '__main__':
     print(f'  -H "Content-Type: application/json" \\')
     print(f'  -d \'{{"title": "Test Task", "priority": "high", "assigned_user_id": 1}}\'')
     
-    app.run(debug=True, port=5000)
+    if uvicorn is not None:
+        uvicorn.run("api_endpoint:asgi_app", host="0.0.0.0", port=5000, workers=1, loop="auto")
+    else:
+        app.run(debug=True, port=5000)
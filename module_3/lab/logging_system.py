@@ -4,15 +4,23 @@ Demonstrates zero-shot, one-shot, and few-shot prompting approaches.
 This implementation combines all approaches into a complete logging system.
 """
 
+import atexit
 import logging
 import json
-from logging.handlers import RotatingFileHandler
-from datetime import datetime
+import os
+import queue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional, Dict, Any
 from enum import Enum
 import threading
 import sys
+import time
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib json module
+    orjson = None
 
 
 class Environment(Enum):
@@ -34,9 +42,25 @@ class ColorCodes:
 class StructuredFormatter(logging.Formatter):
     """JSON formatter for structured logging."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (epoch second, formatted prefix) of the last timestamp, so records
+        # within the same second only format the microseconds
+        self._last_second = (None, '')
+
+    def format_timestamp(self, created: float) -> str:
+        """Local-time ISO 8601 timestamp with microseconds."""
+        second = int(created)
+        cached = self._last_second
+        if cached[0] != second:
+            cached = (second, time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(second)))
+            self._last_second = cached
+        micros = min(round((created - second) * 1_000_000), 999_999)
+        return f"{cached[1]}.{micros:06d}"
+
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "timestamp": self.format_timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -59,24 +83,95 @@ class StructuredFormatter(logging.Formatter):
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
 
+        if orjson is not None:
+            return orjson.dumps(log_data).decode()
         return json.dumps(log_data)
 
 
 class ColoredConsoleFormatter(logging.Formatter):
     """Colored console formatter for development."""
 
-    COLORS = {
-        'DEBUG': ColorCodes.DEBUG,
-        'INFO': ColorCodes.INFO,
-        'WARNING': ColorCodes.WARNING,
-        'ERROR': ColorCodes.ERROR,
-        'CRITICAL': ColorCodes.CRITICAL,
+    # Keyed by levelno, so lookups hash an int and ignore renamed levels
+    LEVEL_COLORS = {
+        logging.DEBUG: ColorCodes.DEBUG,
+        logging.INFO: ColorCodes.INFO,
+        logging.WARNING: ColorCodes.WARNING,
+        logging.ERROR: ColorCodes.ERROR,
+        logging.CRITICAL: ColorCodes.CRITICAL,
     }
 
     def format(self, record: logging.LogRecord) -> str:
-        color = self.COLORS.get(record.levelname, ColorCodes.RESET)
-        record.levelname = f"{color}{record.levelname}{ColorCodes.RESET}"
-        return super().format(record)
+        # Colour the whole line instead of rewriting record.levelname, which
+        # the other handlers see too (it leaked ANSI codes into the JSON logs)
+        color = self.LEVEL_COLORS.get(record.levelno, ColorCodes.RESET)
+        return f"{color}{super().format(record)}{ColorCodes.RESET}"
+
+
+class DualRotatingFileHandler(RotatingFileHandler):
+    """Rotating file handler that also copies severe records to an error file.
+
+    Each record is formatted once and the same line goes to both files,
+    where separate handlers would format it twice each (once to size the
+    rollover check and once to write it).
+    """
+
+    def __init__(
+        self,
+        filename,
+        error_filename,
+        error_level: int = logging.ERROR,
+        maxBytes: int = 0,
+        backupCount: int = 0
+    ):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount)
+        self.error_level = error_level
+        self.error_handler = RotatingFileHandler(
+            error_filename,
+            maxBytes=maxBytes,
+            backupCount=backupCount
+        )
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            line = self.format(record) + self.terminator
+            self._write_line(self, line)
+            if record.levelno >= self.error_level:
+                self._write_line(self.error_handler, line)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    @staticmethod
+    def _write_line(handler: RotatingFileHandler, line: str):
+        """Write a formatted line, rolling the file over first if it would overflow."""
+        if handler.stream is None:
+            handler.stream = handler._open()
+        if (
+            handler.maxBytes > 0
+            and handler.stream.tell() + len(line) >= handler.maxBytes
+            and os.path.isfile(handler.baseFilename)  # never rotate e.g. /dev/null
+        ):
+            handler.doRollover()
+        handler.stream.write(line)
+        handler.stream.flush()
+
+    def close(self):
+        self.error_handler.close()
+        super().close()
+
+
+class InProcessQueueHandler(QueueHandler):
+    """Queue handler for records consumed by a listener in the same process."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class pre-formats the record and drops exc_info so it can be
+        # pickled; here it never leaves the process, so only the message is
+        # resolved (later changes to args can't alter it) and the real
+        # handlers still see the exception and extra fields
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
 class ApplicationLogger:
@@ -98,7 +193,9 @@ class ApplicationLogger:
             return
         self._initialized = True
         self.loggers: Dict[str, logging.Logger] = {}
+        self.listeners: Dict[str, QueueListener] = {}
         self.environment = Environment.DEVELOPMENT
+        atexit.register(self.shutdown)
 
     def configure(
         self,
@@ -154,40 +251,66 @@ class ApplicationLogger:
                 datefmt='%Y-%m-%d %H:%M:%S'
             )
         console_handler.setFormatter(console_format)
-        logger.addHandler(console_handler)
 
-        # Rotating file handler with JSON format for production
-        file_handler = RotatingFileHandler(
-            log_path / f"{name}.log",
-            maxBytes=max_file_size,
-            backupCount=backup_count
-        )
-        file_handler.setLevel(file_level)
-
-        if environment == Environment.PRODUCTION:
+        if environment == Environment.PRODUCTION and file_level <= logging.ERROR:
+            # Both files use the JSON format, so one handler formats each
+            # record once and writes ERROR and above to the error file too
+            file_handler = DualRotatingFileHandler(
+                log_path / f"{name}.log",
+                log_path / f"{name}_errors.log",
+                maxBytes=max_file_size,
+                backupCount=backup_count
+            )
+            file_handler.setLevel(file_level)
             file_handler.setFormatter(StructuredFormatter())
+            handlers = (console_handler, file_handler)
         else:
-            file_handler.setFormatter(
-                logging.Formatter(
-                    '[%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S'
-                )
+            # Rotating file handler with JSON format for production
+            file_handler = RotatingFileHandler(
+                log_path / f"{name}.log",
+                maxBytes=max_file_size,
+                backupCount=backup_count
             )
-        logger.addHandler(file_handler)
-
-        # Error file handler for ERROR and above
-        error_handler = RotatingFileHandler(
-            log_path / f"{name}_errors.log",
-            maxBytes=max_file_size,
-            backupCount=backup_count
-        )
-        error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(StructuredFormatter())
-        logger.addHandler(error_handler)
+            file_handler.setLevel(file_level)
+
+            if environment == Environment.PRODUCTION:
+                file_handler.setFormatter(StructuredFormatter())
+            else:
+                file_handler.setFormatter(
+                    logging.Formatter(
+                        '[%(asctime)s] %(levelname)s [%(name)s.%(funcName)s:%(lineno)d] %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S'
+                    )
+                )
 
+            # Error file handler for ERROR and above
+            error_handler = RotatingFileHandler(
+                log_path / f"{name}_errors.log",
+                maxBytes=max_file_size,
+                backupCount=backup_count
+            )
+            error_handler.setLevel(logging.ERROR)
+            error_handler.setFormatter(StructuredFormatter())
+            handlers = (console_handler, file_handler, error_handler)
+
+        # Formatting and disk writes happen on the listener's thread; the
+        # calling thread only enqueues the record
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        logger.addHandler(InProcessQueueHandler(log_queue))
+
+        self.listeners[name] = listener
         self.loggers[name] = logger
         return logger
 
+    def shutdown(self):
+        """Flush queued records and stop all listener threads."""
+        while self.listeners:
+            name, listener = self.listeners.popitem()
+            listener.stop()
+            self.loggers.pop(name, None)
+
     def log_user_action(self, logger: logging.Logger, action: str, user_id: int, **kwargs):
         """Log user action with context (Few-shot example 3 pattern)."""
         extra = {
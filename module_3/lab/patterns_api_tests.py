@@ -3,12 +3,23 @@
 Few-shot examples for creating REST APIs and comprehensive tests.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
+from werkzeug.exceptions import RequestEntityTooLarge
 import pytest
+import re
 from unittest.mock import Mock, patch
 import json
+from heapq import nsmallest
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to Flask's jsonify
+    orjson = None
 
 app = Flask(__name__)
+# Reject larger bodies before they are read or parsed
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024
 
 # Simulated database
 books_db = [
@@ -17,6 +28,58 @@ books_db = [
 ]
 next_id = 3
 
+# 10 or 13 digits, optionally separated by single hyphens
+ISBN_PATTERN = re.compile(r'\d(?:-?\d){9}(?:(?:-?\d){3})?')
+
+# Lookup indices kept in step with books_db, so duplicate checks and lookups
+# by ID don't scan the list
+books_by_isbn = {b['isbn']: b for b in books_db}
+books_by_id = {b['id']: b for b in books_db}
+
+
+def remove_book(book_id):
+    """Remove a book from books_db and its indices."""
+    book = books_by_id.pop(book_id, None)
+    if book is not None:
+        del books_by_isbn[book['isbn']]
+        books_db.remove(book)
+
+
+def json_response(payload, status: int = 200) -> Response:
+    """Build a JSON response, serialized with orjson when it is installed."""
+    if orjson is None:
+        response = jsonify(payload)
+        response.status_code = status
+        return response
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
+
+
+def read_json_body():
+    """Parse the request's JSON body, with orjson when it is installed.
+    
+    Returns None if the body is not JSON or is malformed.
+    """
+    if not request.is_json:
+        return None
+    if orjson is None:
+        return request.get_json(silent=True)
+    try:
+        return orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return None
+
+
+def _book_matches(book, search, genre, author):
+    """Check one book against all active filters (search and author lowercased)."""
+    if genre and book['genre'] != genre:
+        return False
+    
+    book_author = book['author'].lower()
+    if author and author not in book_author:
+        return False
+    
+    return not search or search in book['title'].lower() or search in book_author
+
 
 # ============================================================================
 # API ENDPOINTS PATTERN LIBRARY
@@ -47,32 +110,21 @@ def get_books():
         
         # Validate pagination
         if page < 1 or limit < 1 or limit > 100:
-            return jsonify({'error': 'Invalid pagination parameters'}), 400
+            return json_response({'error': 'Invalid pagination parameters'}, 400)
         
-        # Filter books
+        # Filter books in a single pass
+        author = author.lower() if author else None
         filtered_books = books_db
         
-        if search:
-            filtered_books = [
-                b for b in filtered_books
-                if search in b['title'].lower() or search in b['author'].lower()
-            ]
-        
-        if genre:
-            filtered_books = [b for b in filtered_books if b['genre'] == genre]
+        if search or genre or author:
+            filtered_books = [b for b in books_db if _book_matches(b, search, genre, author)]
         
-        if author:
-            filtered_books = [b for b in filtered_books if author.lower() in b['author'].lower()]
-        
-        # Sort books
+        # Sort and paginate; only the first `end` books need to be ordered
         sort_key = 'title' if sort_by not in ['title', 'author'] else sort_by
-        filtered_books = sorted(filtered_books, key=lambda x: x[sort_key])
-        
-        # Paginate
         total_count = len(filtered_books)
         start = (page - 1) * limit
         end = start + limit
-        paginated_books = filtered_books[start:end]
+        paginated_books = nsmallest(end, filtered_books, key=itemgetter(sort_key))[start:]
         
         # Prepare response with metadata
         response = {
@@ -86,14 +138,14 @@ def get_books():
         }
         
         # Add caching headers
-        resp = jsonify(response)
+        resp = json_response(response)
         resp.headers['Cache-Control'] = 'public, max-age=300'  # 5 minutes
         return resp, 200
         
     except ValueError:
-        return jsonify({'error': 'Invalid parameter type'}), 400
+        return json_response({'error': 'Invalid parameter type'}, 400)
     except Exception as e:
-        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+        return json_response({'error': 'Internal server error', 'message': str(e)}, 500)
 
 
 @app.route('/api/books', methods=['POST'])
@@ -110,30 +162,29 @@ def create_book():
         # Authentication check (simulated)
         auth_header = request.headers.get('Authorization')
         if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({'error': 'Authentication required'}), 401
+            return json_response({'error': 'Authentication required'}, 401)
         
         # Get JSON payload
-        data = request.get_json()
+        data = read_json_body()
         if not data:
-            return jsonify({'error': 'Request body must be JSON'}), 400
+            return json_response({'error': 'Request body must be JSON'}, 400)
         
         # Validate required fields
         required_fields = ['title', 'author', 'isbn']
         missing_fields = [f for f in required_fields if not data.get(f)]
         if missing_fields:
-            return jsonify({
+            return json_response({
                 'error': 'Missing required fields',
                 'fields': missing_fields
-            }), 400
+            }, 400)
         
         # Validate ISBN format (simplified)
-        isbn = data['isbn'].replace('-', '')
-        if not (len(isbn) in [10, 13] and isbn.isdigit()):
-            return jsonify({'error': 'Invalid ISBN format'}), 400
+        if not ISBN_PATTERN.fullmatch(data['isbn']):
+            return json_response({'error': 'Invalid ISBN format'}, 400)
         
         # Check for duplicate ISBN
-        if any(b['isbn'] == data['isbn'] for b in books_db):
-            return jsonify({'error': 'Book with this ISBN already exists'}), 409
+        if data['isbn'] in books_by_isbn:
+            return json_response({'error': 'Book with this ISBN already exists'}, 409)
         
         # Create book
         book = {
@@ -146,6 +197,8 @@ def create_book():
         }
         
         books_db.append(book)
+        books_by_isbn[book['isbn']] = book
+        books_by_id[book['id']] = book
         next_id += 1
         
         # Log operation (simulated)
@@ -155,14 +208,16 @@ def create_book():
         print(f"[NOTIFY] New book added: {book['title']}")
         
         # Return created resource
-        return jsonify({
+        return json_response({
             'message': 'Book created successfully',
             'data': book
-        }), 201
+        }, 201)
         
+    except RequestEntityTooLarge:
+        return json_response({'error': 'Payload too large'}, 413)
     except Exception as e:
         print(f"[ERROR] Failed to create book: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return json_response({'error': 'Internal server error'}, 500)
 
 
 @app.route('/api/books/<int:book_id>', methods=['PUT'])
@@ -175,20 +230,20 @@ def update_book(book_id):
     """
     try:
         # Find book
-        book = next((b for b in books_db if b['id'] == book_id), None)
+        book = books_by_id.get(book_id)
         if not book:
-            return jsonify({'error': 'Book not found'}), 404
+            return json_response({'error': 'Book not found'}, 404)
         
         # Get update data
-        data = request.get_json()
+        data = read_json_body()
         if not data:
-            return jsonify({'error': 'Request body must be JSON'}), 400
+            return json_response({'error': 'Request body must be JSON'}, 400)
         
         # Business rule: Cannot change status if book is checked out
         if book['checked_out'] and 'checked_out' in data:
-            return jsonify({
+            return json_response({
                 'error': 'Cannot modify checkout status while book is checked out'
-            }), 400
+            }, 400)
         
         # Partial update
         allowed_fields = ['title', 'author', 'genre']
@@ -202,15 +257,17 @@ def update_book(book_id):
         # Audit trail (simulated)
         print(f"[AUDIT] Book {book_id} updated. Fields: {', '.join(updated_fields)}")
         
-        return jsonify({
+        return json_response({
             'message': 'Book updated successfully',
             'data': book,
             'updated_fields': updated_fields
-        }), 200
+        }, 200)
         
+    except RequestEntityTooLarge:
+        return json_response({'error': 'Payload too large'}, 413)
     except Exception as e:
         print(f"[ERROR] Failed to update book: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return json_response({'error': 'Internal server error'}, 500)
 
 
 # ============================================================================
@@ -267,7 +324,7 @@ class TestBookAPI:
         
         # Cleanup (remove test book)
         created_id = data['data']['id']
-        books_db[:] = [b for b in books_db if b['id'] != created_id]
+        remove_book(created_id)
 
     # ========================================================================
     # Integration Test Pattern - Example 2
@@ -320,7 +377,7 @@ class TestBookAPI:
             
         finally:
             # Cleanup
-            books_db[:] = [b for b in books_db if b['id'] != created_book['id']]
+            remove_book(created_book['id'])
 
     # ========================================================================
     # Error Handling Test Pattern - Example 3
@@ -4,15 +4,20 @@ Few-shot examples for creating database models with SQLAlchemy.
 """
 
 from sqlalchemy import (
-    Column, Integer, String, Text, Boolean, DateTime, ForeignKey,
-    Enum as SQLEnum, UniqueConstraint, Index, Table
+    Column, Integer, String, Text, ForeignKey,
+    SmallInteger, CheckConstraint, UniqueConstraint, Index, Table,
+    TypeDecorator, create_engine, event, func, text, update
 )
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from datetime import datetime
+from typing import List, Optional
 import enum
+import os
 
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    """Declarative base for all models (SQLAlchemy 2.0 style)."""
 
 
 # Many-to-many association table for posts and tags
@@ -26,6 +31,35 @@ post_tags = Table(
 )
 
 
+def create_database_engine(url, **kwargs):
+    """
+    Create an engine tuned for the given database URL.
+    
+    psycopg2 batches executemany INSERTs into multi-row VALUES statements;
+    SQLite switches to WAL so repeated commits don't fsync each time.
+    Statement logging is off unless SQL_ECHO is set.
+    """
+    url = make_url(url)
+    kwargs.setdefault('echo', bool(os.environ.get('SQL_ECHO')))
+    kwargs.setdefault('insertmanyvalues_page_size', 10_000)
+    if url.get_driver_name() == 'psycopg2':
+        kwargs.setdefault('executemany_mode', 'values_plus_batch')
+
+    engine = create_engine(url, **kwargs)
+
+    if url.get_backend_name() == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            # ON DELETE CASCADE is only enforced with foreign keys enabled
+            cursor.execute('PRAGMA foreign_keys=ON')
+            cursor.close()
+
+    return engine
+
+
 class PostStatus(enum.Enum):
     """Post status enumeration."""
     DRAFT = "draft"
@@ -33,6 +67,21 @@ class PostStatus(enum.Enum):
     ARCHIVED = "archived"
 
 
+class PostStatusType(TypeDecorator):
+    """Store PostStatus as a 2-byte code instead of its label string."""
+    impl = SmallInteger
+    cache_ok = True
+
+    CODES = {PostStatus.DRAFT: 0, PostStatus.PUBLISHED: 1, PostStatus.ARCHIVED: 2}
+    STATUSES = {code: status for status, code in CODES.items()}
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else self.CODES[value]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.STATUSES[value]
+
+
 class User(Base):
     """
     User model - Example 1 from pattern library.
@@ -43,25 +92,29 @@ class User(Base):
     __tablename__ = 'users'
 
     # Primary key with auto-increment
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     
     # Unique fields with constraints
-    username = Column(String(50), unique=True, nullable=False, index=True)
-    email = Column(String(255), unique=True, nullable=False, index=True)
+    username: Mapped[str] = mapped_column(String(50), unique=True, index=True)
+    email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     
     # Encrypted password (store hash, not plain text)
-    password_hash = Column(String(255), nullable=False)
+    password_hash: Mapped[str] = mapped_column(String(255))
     
-    # Timestamps with auto-generation
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Timestamps filled in by the database
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
     
     # Status flags
-    is_active = Column(Boolean, default=True, nullable=False)
+    is_active: Mapped[bool] = mapped_column(default=True)
     
     # Relationships with foreign key constraints
-    posts = relationship('Post', back_populates='author', cascade='all, delete-orphan')
-    comments = relationship('Comment', back_populates='user', cascade='all, delete-orphan')
+    posts: Mapped[List['Post']] = relationship(
+        back_populates='author', cascade='all, delete-orphan', lazy='raise', passive_deletes=True
+    )
+    comments: Mapped[List['Comment']] = relationship(
+        back_populates='user', cascade='all, delete-orphan', passive_deletes=True
+    )
     
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}')>"
@@ -71,13 +124,13 @@ class Category(Base):
     """Category model for organizing posts."""
     __tablename__ = 'categories'
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String(100), unique=True, nullable=False)
-    slug = Column(String(100), unique=True, nullable=False, index=True)
-    description = Column(Text)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(100), unique=True)
+    slug: Mapped[str] = mapped_column(String(100), unique=True, index=True)
+    description: Mapped[Optional[str]] = mapped_column(Text)
     
     # Relationships
-    posts = relationship('Post', back_populates='category')
+    posts: Mapped[List['Post']] = relationship(back_populates='category')
     
     def __repr__(self):
         return f"<Category(id={self.id}, name='{self.name}')>"
@@ -87,12 +140,12 @@ class Tag(Base):
     """Tag model for post tagging."""
     __tablename__ = 'tags'
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String(50), unique=True, nullable=False)
-    slug = Column(String(50), unique=True, nullable=False, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(50), unique=True)
+    slug: Mapped[str] = mapped_column(String(50), unique=True, index=True)
     
     # Many-to-many relationship with posts
-    posts = relationship('Post', secondary=post_tags, back_populates='tags')
+    posts: Mapped[List['Post']] = relationship(secondary=post_tags, back_populates='tags')
     
     def __repr__(self):
         return f"<Tag(id={self.id}, name='{self.name}')>"
@@ -108,40 +161,69 @@ class Post(Base):
     __tablename__ = 'posts'
 
     # Primary key
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     
     # Content fields
-    title = Column(String(200), nullable=False)
-    slug = Column(String(250), unique=True, nullable=False, index=True)
-    content = Column(Text, nullable=False)
+    title: Mapped[str] = mapped_column(String(200))
+    slug: Mapped[str] = mapped_column(String(250), unique=True, index=True)
+    content: Mapped[str] = mapped_column(Text)
     
     # Foreign keys with relationships
-    author_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
-    category_id = Column(Integer, ForeignKey('categories.id', ondelete='SET NULL'))
+    author_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
+    category_id: Mapped[Optional[int]] = mapped_column(ForeignKey('categories.id', ondelete='SET NULL'))
     
     # Status enumeration
-    status = Column(SQLEnum(PostStatus), default=PostStatus.DRAFT, nullable=False, index=True)
+    status: Mapped[PostStatus] = mapped_column(PostStatusType(), default=PostStatus.DRAFT)
     
     # Timestamps
-    published_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    published_at: Mapped[Optional[datetime]] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
     
     # Metrics
-    view_count = Column(Integer, default=0, nullable=False)
+    view_count: Mapped[int] = mapped_column(default=0)
     
-    # Relationships
-    author = relationship('User', back_populates='posts')
-    category = relationship('Category', back_populates='posts')
-    comments = relationship('Comment', back_populates='post', cascade='all, delete-orphan')
-    tags = relationship('Tag', secondary=post_tags, back_populates='posts')
+    # Relationships: author and tags are always shown with a post, so load
+    # them eagerly; comments must be loaded explicitly at the query site
+    author: Mapped['User'] = relationship(back_populates='posts', lazy='joined')
+    category: Mapped[Optional['Category']] = relationship(back_populates='posts')
+    comments: Mapped[List['Comment']] = relationship(
+        back_populates='post', cascade='all, delete-orphan', lazy='raise', passive_deletes=True
+    )
+    tags: Mapped[List['Tag']] = relationship(secondary=post_tags, back_populates='posts', lazy='selectin')
     
     # Composite indexes for common queries
     __table_args__ = (
+        CheckConstraint('status IN (0, 1, 2)', name='ck_post_status'),
         Index('idx_posts_author_status', 'author_id', 'status'),
-        Index('idx_posts_published_status', 'published_at', 'status'),
+        # Draft/archived listings; the partial index below only holds published rows
+        Index('idx_posts_status_created', 'status', 'created_at'),
+        # Published feed, newest first: a partial index over published rows
+        # only (status code 1), covering on Postgres
+        Index(
+            'idx_posts_published_only', published_at.desc(),
+            postgresql_where=text('status = 1'),
+            sqlite_where=text('status = 1'),
+            postgresql_include=('title', 'slug', 'author_id')
+        ),
     )
     
+    @classmethod
+    def increment_views(cls, session, post_id, delta=1):
+        """
+        Atomically add delta to a post's view count.
+        
+        A single UPDATE ... SET view_count = view_count + :delta avoids the
+        SELECT + UPDATE round-trips of post.view_count += 1. Counters
+        buffered elsewhere can be flushed by passing the accumulated delta.
+        """
+        session.execute(
+            update(cls)
+            .where(cls.id == post_id)
+            .values(view_count=cls.view_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+    
     def __repr__(self):
         return f"<Post(id={self.id}, title='{self.title}', status='{self.status.value}')>"
 
@@ -156,35 +238,45 @@ class Comment(Base):
     __tablename__ = 'comments'
 
     # Primary key
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     
     # Foreign keys
-    post_id = Column(Integer, ForeignKey('posts.id', ondelete='CASCADE'), nullable=False)
-    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    post_id: Mapped[int] = mapped_column(ForeignKey('posts.id', ondelete='CASCADE'))
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
     
     # Self-referential for nested comments (replies)
-    parent_id = Column(Integer, ForeignKey('comments.id', ondelete='CASCADE'), nullable=True)
+    parent_id: Mapped[Optional[int]] = mapped_column(ForeignKey('comments.id', ondelete='CASCADE'))
     
     # Content
-    content = Column(Text, nullable=False)
+    content: Mapped[str] = mapped_column(Text)
     
     # Moderation
-    is_approved = Column(Boolean, default=False, nullable=False)
+    is_approved: Mapped[bool] = mapped_column(default=False)
     
     # Timestamps
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    post = relationship('Post', back_populates='comments')
-    user = relationship('User', back_populates='comments')
-    parent = relationship('Comment', remote_side=[id], backref='replies')
+    post: Mapped['Post'] = relationship(back_populates='comments')
+    user: Mapped['User'] = relationship(back_populates='comments')
+    parent: Mapped[Optional['Comment']] = relationship(back_populates='replies', remote_side=[id])
+    replies: Mapped[List['Comment']] = relationship(back_populates='parent')
     
     # Indexes for fast retrieval
     __table_args__ = (
         Index('idx_comments_post_approved', 'post_id', 'is_approved'),
         Index('idx_comments_user', 'user_id'),
+        # Comment tree: top-level (parent_id IS NULL) and replies by age
+        Index('idx_comments_post_parent_created', 'post_id', 'parent_id', 'created_at'),
         Index('idx_comments_parent', 'parent_id'),
+        # Approved comments per post in display order; unapproved rows
+        # awaiting moderation stay out of the index
+        Index(
+            'idx_comments_approved_only', 'post_id', 'created_at',
+            postgresql_where=text('is_approved'),
+            sqlite_where=text('is_approved')
+        ),
     )
     
     def __repr__(self):
@@ -193,83 +285,121 @@ class Comment(Base):
 
 # Example usage demonstrating the patterns
 if __name__ == "__main__":
-    from sqlalchemy import create_engine
-    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy import insert, select
+    from sqlalchemy.orm import selectinload, sessionmaker
 
-    # Create in-memory SQLite database
-    engine = create_engine('sqlite:///:memory:', echo=True)
+    # Create in-memory SQLite database (set SQL_ECHO=1 to log statements)
+    engine = create_database_engine('sqlite:///:memory:')
     Base.metadata.create_all(engine)
     
     Session = sessionmaker(bind=engine)
-    session = Session()
 
-    try:
+    # All writes share one transaction that commits once when the block
+    # exits; committing after each group would pay a sync/round-trip each
+    with Session.begin() as session:
+        # Rows are collected as dicts and written with one executemany
+        # INSERT per table instead of a unit-of-work flush per object
+
         # Create user (Example 1 pattern)
-        user = User(
-            username='johndoe',
-            email='john@example.com',
-            password_hash='hashed_password_here',
-            is_active=True
+        user_id = session.scalar(
+            insert(User).returning(User.id),
+            [{
+                'username': 'johndoe',
+                'email': 'john@example.com',
+                'password_hash': 'hashed_password_here',
+                'is_active': True
+            }]
         )
-        session.add(user)
         
         # Create category
-        category = Category(
-            name='Technology',
-            slug='technology',
-            description='Tech-related posts'
+        category_id = session.scalar(
+            insert(Category).returning(Category.id),
+            [{
+                'name': 'Technology',
+                'slug': 'technology',
+                'description': 'Tech-related posts'
+            }]
         )
-        session.add(category)
         
         # Create tags
-        tag1 = Tag(name='Python', slug='python')
-        tag2 = Tag(name='Database', slug='database')
-        session.add_all([tag1, tag2])
-        
-        session.commit()
+        tag_rows = [
+            {'name': 'Python', 'slug': 'python'},
+            {'name': 'Database', 'slug': 'database'}
+        ]
+        tag_ids = session.scalars(
+            insert(Tag).returning(Tag.id, sort_by_parameter_order=True),
+            tag_rows
+        ).all()
         
         # Create post (Example 2 pattern)
-        post = Post(
-            title='Introduction to SQLAlchemy',
-            slug='intro-to-sqlalchemy',
-            content='SQLAlchemy is a powerful ORM...',
-            author_id=user.id,
-            category_id=category.id,
-            status=PostStatus.PUBLISHED,
-            published_at=datetime.utcnow(),
-            tags=[tag1, tag2]
+        post_id = session.scalar(
+            insert(Post).returning(Post.id),
+            [{
+                'title': 'Introduction to SQLAlchemy',
+                'slug': 'intro-to-sqlalchemy',
+                'content': 'SQLAlchemy is a powerful ORM...',
+                'author_id': user_id,
+                'category_id': category_id,
+                'status': PostStatus.PUBLISHED,
+                'published_at': datetime.utcnow()
+            }]
+        )
+        
+        # Link tags through the association table directly
+        session.execute(
+            insert(post_tags),
+            [{'post_id': post_id, 'tag_id': tag_id} for tag_id in tag_ids]
         )
-        session.add(post)
-        session.commit()
         
         # Create comment (Example 3 pattern)
-        comment = Comment(
-            post_id=post.id,
-            user_id=user.id,
-            content='Great article!',
-            is_approved=True
+        comment_id = session.scalar(
+            insert(Comment).returning(Comment.id),
+            [{
+                'post_id': post_id,
+                'user_id': user_id,
+                'content': 'Great article!',
+                'is_approved': True
+            }]
         )
-        session.add(comment)
         
         # Create nested reply
-        reply = Comment(
-            post_id=post.id,
-            user_id=user.id,
-            parent_id=comment.id,
-            content='Thanks for reading!',
-            is_approved=True
+        session.execute(
+            insert(Comment),
+            [{
+                'post_id': post_id,
+                'user_id': user_id,
+                'parent_id': comment_id,
+                'content': 'Thanks for reading!',
+                'is_approved': True
+            }]
         )
-        session.add(reply)
-        session.commit()
+        
+        # Count a page view without loading the post
+        Post.increment_views(session, post_id)
+    
+    with Session() as session:
+        # Load the whole graph up front: one IN-query per collection
+        # instead of a lazy SELECT per attribute access
+        user_posts = selectinload(User.posts)
+        user = session.scalars(
+            select(User)
+            .where(User.id == user_id)
+            .options(
+                user_posts.joinedload(Post.category),
+                user_posts.selectinload(Post.tags),
+                user_posts.selectinload(Post.comments)
+                .selectinload(Comment.replies)
+            )
+        ).one()
+        post = user.posts[0]
+        comment = session.get(Comment, comment_id)
         
         # Query examples
         print("\n=== Query Results ===")
         print(f"User: {user}")
         print(f"User's posts: {len(user.posts)}")
         print(f"Post: {post}")
+        print(f"Post views: {post.view_count}")
         print(f"Post tags: {[tag.name for tag in post.tags]}")
         print(f"Comments on post: {len(post.comments)}")
         print(f"Comment replies: {len(comment.replies)}")
-        
-    finally:
-        session.close()
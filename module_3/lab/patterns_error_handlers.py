@@ -3,11 +3,16 @@
 Few-shot examples for comprehensive error handling in microservices.
 """
 
+import re
+import random
+import sys
+import threading
 import time
 import functools
-from typing import Callable, Any, Optional, Dict
+from types import MappingProxyType
+from typing import Callable, Any, ClassVar, Optional, Dict, Mapping
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 import requests
 from requests.exceptions import Timeout, ConnectionError, RequestException
 
@@ -28,6 +33,22 @@ class ValidationError(Exception):
         super().__init__(self.message)
 
 
+# (10ms tick, ISO 8601 string) of the last formatted timestamp
+_last_timestamp = (0, '')
+
+
+def utc_timestamp() -> str:
+    """Current UTC time in ISO 8601, formatted at most once per 10ms tick."""
+    global _last_timestamp
+    now = time.time()
+    tick = int(now * 100)
+    cached = _last_timestamp
+    if cached[0] != tick:
+        cached = (tick, datetime.utcfromtimestamp(now).isoformat())
+        _last_timestamp = cached
+    return cached[1]
+
+
 def validation_error_handler(func: Callable) -> Callable:
     """
     Validation error handler decorator.
@@ -42,7 +63,7 @@ def validation_error_handler(func: Callable) -> Callable:
         except ValidationError as e:
             # Log validation failure for monitoring
             logger.warning(
-                f"Validation failed in {func.__name__}: {e.message}",
+                "Validation failed in %s: %s", func.__name__, e.message,
                 extra={'field_errors': e.field_errors}
             )
             
@@ -52,7 +73,7 @@ def validation_error_handler(func: Callable) -> Callable:
                 'message': e.message,
                 'fields': e.field_errors,
                 'suggestions': _generate_suggestions(e.field_errors),
-                'timestamp': datetime.utcnow().isoformat(),
+                'timestamp': utc_timestamp(),
                 'error_code': 'VALIDATION_ERROR'
             }
             
@@ -61,16 +82,30 @@ def validation_error_handler(func: Callable) -> Callable:
     return wrapper
 
 
+# (pattern, suggestion) pairs checked in order against each field name
+SUGGESTION_RULES = (
+    (re.compile('email', re.IGNORECASE), "Use format: user@example.com"),
+    (re.compile('password', re.IGNORECASE), "Use 8+ characters with uppercase, lowercase, number, and symbol"),
+    (re.compile('phone', re.IGNORECASE), "Use format: +1-555-123-4567"),
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _suggestion_for_field(field: str) -> Optional[str]:
+    """Return the suggestion for a field name (memoized per name)."""
+    for pattern, suggestion in SUGGESTION_RULES:
+        if pattern.search(field):
+            return suggestion
+    return None
+
+
 def _generate_suggestions(field_errors: Dict[str, str]) -> Dict[str, str]:
     """Generate helpful suggestions for fixing validation errors."""
     suggestions = {}
-    for field, error in field_errors.items():
-        if 'email' in field.lower():
-            suggestions[field] = "Use format: user@example.com"
-        elif 'password' in field.lower():
-            suggestions[field] = "Use 8+ characters with uppercase, lowercase, number, and symbol"
-        elif 'phone' in field.lower():
-            suggestions[field] = "Use format: +1-555-123-4567"
+    for field in field_errors:
+        suggestion = _suggestion_for_field(field)
+        if suggestion is not None:
+            suggestions[field] = suggestion
     return suggestions
 
 
@@ -84,59 +119,96 @@ class DatabaseError(Exception):
 
 
 class CircuitBreaker:
-    """Circuit breaker pattern for database operations."""
+    """
+    Circuit breaker pattern for database operations.
+    
+    State changes happen under a lock so concurrent callers don't lose
+    failure counts; while CLOSED, successful calls never take the lock.
+    """
     
     def __init__(self, failure_threshold: int = 5, timeout: int = 60):
         self.failure_threshold = failure_threshold
         self.timeout = timeout
         self.failure_count = 0
-        self.last_failure_time = None
+        self.last_failure_time = 0.0  # time.monotonic() of the last failure
         self.state = 'CLOSED'  # CLOSED, OPEN, HALF_OPEN
+        self._lock = threading.Lock()
     
     def call(self, func: Callable, *args, **kwargs) -> Any:
         """Execute function with circuit breaker protection."""
-        if self.state == 'OPEN':
-            if datetime.now() - self.last_failure_time > timedelta(seconds=self.timeout):
-                self.state = 'HALF_OPEN'
-                logger.info("Circuit breaker entering HALF_OPEN state")
-            else:
-                raise DatabaseError("Circuit breaker is OPEN, database unavailable")
+        if self.state != 'CLOSED':
+            with self._lock:
+                if self.state == 'OPEN':
+                    if time.monotonic() - self.last_failure_time > self.timeout:
+                        self.state = 'HALF_OPEN'
+                        logger.info("Circuit breaker entering HALF_OPEN state")
+                    else:
+                        raise DatabaseError("Circuit breaker is OPEN, database unavailable")
         
         try:
             result = func(*args, **kwargs)
-            if self.state == 'HALF_OPEN':
-                self.state = 'CLOSED'
-                self.failure_count = 0
-                logger.info("Circuit breaker reset to CLOSED state")
-            return result
         except Exception as e:
-            self.failure_count += 1
-            self.last_failure_time = datetime.now()
-            
-            if self.failure_count >= self.failure_threshold:
-                self.state = 'OPEN'
-                logger.error(f"Circuit breaker opened after {self.failure_count} failures")
+            with self._lock:
+                self.failure_count += 1
+                self.last_failure_time = time.monotonic()
+                
+                if self.failure_count >= self.failure_threshold:
+                    self.state = 'OPEN'
+                    logger.error("Circuit breaker opened after %d failures", self.failure_count)
             
             raise e
+        
+        if self.state == 'HALF_OPEN':
+            with self._lock:
+                if self.state == 'HALF_OPEN':
+                    self.state = 'CLOSED'
+                    self.failure_count = 0
+                    logger.info("Circuit breaker reset to CLOSED state")
+        return result
+
+
+# Classifies driver error messages in one case-insensitive scan
+DB_ERROR_PATTERN = re.compile(
+    r'(?P<deadlock>deadlock)|(?P<lock_wait>lock\s*wait\s*timeout)|(?P<constraint>constraint)',
+    re.IGNORECASE
+)
+
+# Set during shutdown to cut short any retry backoff in progress
+retry_shutdown = threading.Event()
+
+
+def _next_backoff(attempt: int, backoff_factor: float, max_delay: float) -> float:
+    """Full jitter: spread retries so clients don't retry in lockstep."""
+    return random.uniform(0, min(max_delay, backoff_factor ** attempt))
 
 
 def database_error_handler(
     max_retries: int = 3,
     backoff_factor: float = 2.0,
-    circuit_breaker: Optional[CircuitBreaker] = None
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    max_delay: float = 30.0,
+    deadline: Optional[float] = None
 ):
     """
     Database error handler with retry logic and circuit breaker.
     
     Demonstrates: connection timeouts, deadlocks, constraint violations,
-    exponential backoff, circuit breaker, fallback mechanisms.
+    jittered exponential backoff, retry deadlines, circuit breaker,
+    fallback mechanisms.
+    
+    Retry n waits a random time up to backoff_factor ** n seconds (1 s, 2 s,
+    ... by default), capped at max_delay. deadline bounds the total
+    seconds spent retrying. Waits end early once retry_shutdown is set.
     """
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             last_exception = None
+            give_up_at = time.monotonic() + deadline if deadline is not None else None
+            attempts = 0
             
             for attempt in range(max_retries):
+                attempts = attempt + 1
                 try:
                     # Use circuit breaker if provided
                     if circuit_breaker:
@@ -146,26 +218,37 @@ def database_error_handler(
                     
                 except ConnectionError as e:
                     last_exception = e
-                    wait_time = backoff_factor ** attempt
-                    logger.warning(
-                        f"Database connection failed (attempt {attempt + 1}/{max_retries}). "
-                        f"Retrying in {wait_time}s...",
-                        extra={'error': str(e)}
-                    )
-                    time.sleep(wait_time)
+                    if attempts == max_retries:
+                        break
+                    wait_time = _next_backoff(attempt, backoff_factor, max_delay)
+                    if give_up_at is not None and time.monotonic() + wait_time > give_up_at:
+                        logger.warning("Retry deadline reached for %s", func.__name__)
+                        break
+                    if logger.isEnabledFor(logging.WARNING):
+                        logger.warning(
+                            "Database connection failed (attempt %d/%d). Retrying in %.2fs...",
+                            attempt + 1, max_retries, wait_time,
+                            extra={'error': str(e)}
+                        )
+                    if retry_shutdown.wait(wait_time):
+                        break
                     
                 except Exception as e:
                     error_type = type(e).__name__
+                    match = DB_ERROR_PATTERN.search(str(e))
+                    error_kind = match.lastgroup if match else None
                     
                     # Handle specific database errors
-                    if 'deadlock' in str(e).lower():
-                        logger.error(f"Database deadlock detected: {str(e)}")
+                    if error_kind in ('deadlock', 'lock_wait'):
+                        logger.error("Database deadlock detected: %s", e)
                         # Implement deadlock-specific retry logic
-                        time.sleep(0.1 * (attempt + 1))
                         last_exception = e
-                    elif 'constraint' in str(e).lower():
+                        deadlock_wait = random.uniform(0.05, 0.1 * attempts)
+                        if attempts < max_retries and retry_shutdown.wait(deadlock_wait):
+                            break
+                    elif error_kind == 'constraint':
                         # Don't retry constraint violations
-                        logger.error(f"Database constraint violation: {str(e)}")
+                        logger.error("Database constraint violation: %s", e)
                         return {
                             'error': 'Data Integrity Error',
                             'message': 'The operation violates database constraints',
@@ -178,10 +261,11 @@ def database_error_handler(
                         raise e
             
             # All retries exhausted
-            logger.error(
-                f"Database operation failed after {max_retries} attempts",
-                extra={'last_error': str(last_exception)}
-            )
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(
+                    "Database operation failed after %d attempts", attempts,
+                    extra={'last_error': str(last_exception)}
+                )
             
             # Try fallback mechanism
             fallback_result = _try_fallback(func.__name__, *args, **kwargs)
@@ -202,7 +286,7 @@ def database_error_handler(
 def _try_fallback(operation_name: str, *args, **kwargs) -> Optional[Any]:
     """Attempt fallback for read operations using cache."""
     if 'get' in operation_name.lower() or 'read' in operation_name.lower():
-        logger.info(f"Attempting cache fallback for {operation_name}")
+        logger.info("Attempting cache fallback for %s", operation_name)
         # Return cached data if available
         # This would integrate with actual cache system
         return None
@@ -211,7 +295,7 @@ def _try_fallback(operation_name: str, *args, **kwargs) -> Optional[Any]:
 
 def _send_alert(message: str) -> None:
     """Send alert for critical database issues."""
-    logger.critical(f"ALERT: {message}")
+    logger.critical("ALERT: %s", message)
     # Integrate with alerting system (PagerDuty, Slack, etc.)
 
 
@@ -225,29 +309,50 @@ class ExternalServiceError(Exception):
 
 
 class ServiceHealthMonitor:
-    """Monitor external service health and manage failover."""
+    """
+    Monitor external service health and manage failover.
     
-    def __init__(self):
+    Failure counts decay: a service whose last failure is older than
+    failure_window seconds counts as healthy again and starts a fresh
+    count on its next failure, so it recovers without a manual reset.
+    """
+    
+    DEFAULT_BACKUPS: ClassVar[Mapping[str, str]] = MappingProxyType({
+        'payment_primary': 'payment_backup',
+        'email_primary': 'email_backup'
+    })
+    
+    def __init__(self, failure_window: float = 60.0):
         self.services = {}
         self.failure_counts = {}
-        self.last_check = {}
+        self.last_check = {}  # time.monotonic() of each service's last failure
+        self.failure_window = failure_window
+        self._lock = threading.Lock()
+        self.backup_services = dict(self.DEFAULT_BACKUPS)
     
     def record_failure(self, service_name: str):
         """Record service failure."""
-        self.failure_counts[service_name] = self.failure_counts.get(service_name, 0) + 1
-        self.last_check[service_name] = datetime.now()
+        now = time.monotonic()
+        with self._lock:
+            if now - self.last_check.get(service_name, now) > self.failure_window:
+                self.failure_counts[service_name] = 0
+            self.failure_counts[service_name] = self.failure_counts.get(service_name, 0) + 1
+            self.last_check[service_name] = now
     
     def is_healthy(self, service_name: str, threshold: int = 5) -> bool:
-        """Check if service is healthy."""
-        return self.failure_counts.get(service_name, 0) < threshold
+        """Check if service is healthy (lock-free read)."""
+        if self.failure_counts.get(service_name, 0) < threshold:
+            return True
+        return time.monotonic() - self.last_check.get(service_name, 0.0) > self.failure_window
+    
+    def register_backup(self, primary: str, backup: str) -> None:
+        """Register a backup service, e.g. from configuration at startup."""
+        # Names read from config aren't interned like source literals are
+        self.backup_services[sys.intern(primary)] = sys.intern(backup)
     
     def get_backup_service(self, primary: str) -> Optional[str]:
         """Get backup service endpoint."""
-        backup_map = {
-            'payment_primary': 'payment_backup',
-            'email_primary': 'email_backup'
-        }
-        return backup_map.get(primary)
+        return self.backup_services.get(primary)
 
 
 service_monitor = ServiceHealthMonitor()
@@ -271,7 +376,7 @@ def external_service_handler(
             try:
                 # Check service health
                 if not service_monitor.is_healthy(service_name):
-                    logger.warning(f"Service {service_name} marked unhealthy, trying backup")
+                    logger.warning("Service %s marked unhealthy, trying backup", service_name)
                     backup = service_monitor.get_backup_service(service_name)
                     if backup and enable_fallback:
                         kwargs['service_endpoint'] = backup
@@ -285,7 +390,7 @@ def external_service_handler(
                 return result
                 
             except Timeout:
-                logger.error(f"Timeout calling {service_name}")
+                logger.error("Timeout calling %s", service_name)
                 service_monitor.record_failure(service_name)
                 
                 # Try cached response
@@ -302,19 +407,19 @@ def external_service_handler(
                 }, 504
                 
             except ConnectionError as e:
-                logger.error(f"Connection error with {service_name}: {str(e)}")
+                logger.error("Connection error with %s: %s", service_name, e)
                 service_monitor.record_failure(service_name)
                 
                 # Attempt backup service
                 if enable_fallback:
                     backup = service_monitor.get_backup_service(service_name)
                     if backup:
-                        logger.info(f"Switching to backup service: {backup}")
+                        logger.info("Switching to backup service: %s", backup)
                         try:
                             kwargs['service_endpoint'] = backup
                             return func(*args, **kwargs)
                         except Exception as backup_error:
-                            logger.error(f"Backup service also failed: {str(backup_error)}")
+                            logger.error("Backup service also failed: %s", backup_error)
                 
                 return {
                     'error': 'Service Unavailable',
@@ -326,7 +431,7 @@ def external_service_handler(
                 # Handle rate limiting (429 status)
                 if hasattr(e, 'response') and e.response.status_code == 429:
                     retry_after = e.response.headers.get('Retry-After', 60)
-                    logger.warning(f"Rate limited by {service_name}. Retry after {retry_after}s")
+                    logger.warning("Rate limited by %s. Retry after %ss", service_name, retry_after)
                     return {
                         'error': 'Rate Limit Exceeded',
                         'message': 'Too many requests. Please try again later.',
@@ -334,7 +439,7 @@ def external_service_handler(
                         'error_code': 'RATE_LIMITED'
                     }, 429
                 
-                logger.error(f"Request failed for {service_name}: {str(e)}")
+                logger.error("Request failed for %s: %s", service_name, e)
                 return {
                     'error': 'External Service Error',
                     'message': 'Failed to communicate with external service',
@@ -5,10 +5,17 @@ advanced filtering, pagination, and performance optimization.
 """
 
 import re
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Sequence, Set, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:  # optional; falls back to filtering plain lists
+    np = None
+
 
 class SortOrder(Enum):
     RELEVANCE = "relevance"
@@ -18,7 +25,7 @@ class SortOrder(Enum):
     NAME_DESC = "name_desc"
 
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     id: int
     name: str
@@ -26,16 +33,48 @@ class Product:
     category: str
     price: float
     availability: bool
-    relevance_score: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     products: List[Product]
     total_count: int
     page: int
     page_size: int
     total_pages: int
+    # Relevance of each returned product for the query (empty without one)
+    relevance_scores: List[float] = field(default_factory=list)
+
+
+TOKEN_PATTERN = re.compile(r'\w+')
+RESULTS_CACHE_SIZE = 256
+
+# Sort order -> (sort key, descending)
+SORT_KEYS = {
+    SortOrder.RELEVANCE: ('relevance', True),
+    SortOrder.PRICE_ASC: ('price', False),
+    SortOrder.PRICE_DESC: ('price', True),
+    SortOrder.NAME_ASC: ('name', False),
+    SortOrder.NAME_DESC: ('name', True),
+}
+
+
+def relevance_score(query_lower: str, name_lower: str, desc_lower: str, available: bool) -> float:
+    """Score one product against an already lowercased query."""
+    score = 0.0
+    # Exact name match gets highest score
+    if query_lower == name_lower:
+        score += 100
+    # Name contains query
+    elif query_lower in name_lower:
+        score += 50
+    # Description contains query
+    if query_lower in desc_lower:
+        score += 20
+    # Boost for availability
+    if available:
+        score += 10
+    return score
 
 
 class ProductSearchEngine:
@@ -43,6 +82,30 @@ class ProductSearchEngine:
 
     def __init__(self, products: List[Product]):
         self.products = products
+        # Lowercased text is computed once here instead of on every query
+        self._names_lower = [p.name.lower() for p in products]
+        self._descs_lower = [p.description.lower() for p in products]
+        self._categories_lower = [p.category.lower() for p in products]
+
+        # Inverted index: token -> positions of products whose name or
+        # description contains it, so queries only verify likely matches
+        self._postings: Dict[str, Set[int]] = {}
+        for i, (name, desc) in enumerate(zip(self._names_lower, self._descs_lower)):
+            for token in TOKEN_PATTERN.findall(name + ' ' + desc):
+                self._postings.setdefault(token, set()).add(i)
+
+        # Recent (filters -> matching positions, scores), least recent first
+        self._results_cache: OrderedDict = OrderedDict()
+        self._results_cache_lock = threading.Lock()
+
+        if np is not None:
+            # Column arrays so filters become vectorized boolean masks
+            count = len(products)
+            self._name_array = np.array(self._names_lower, dtype=str)
+            self._desc_array = np.array(self._descs_lower, dtype=str)
+            self._category_array = np.array(self._categories_lower, dtype=str)
+            self._prices = np.fromiter((p.price for p in products), dtype=np.float64, count=count)
+            self._availability = np.fromiter((p.availability for p in products), dtype=np.bool_, count=count)
 
     def search(
         self,
@@ -82,37 +145,70 @@ class ProductSearchEngine:
             raise ValueError("Page size must be between 1 and 100")
 
         try:
-            # Filter products
-            filtered_products = self._filter_products(
+            # Filter products and score them, reusing results for repeated searches
+            indices, scores = self._cached_matches(
                 query, category, min_price, max_price, available_only
             )
-
-            # Calculate relevance scores
-            if query:
-                filtered_products = self._calculate_relevance(query, filtered_products)
-
-            # Sort products
-            sorted_products = self._sort_products(filtered_products, sort_by)
+            # Sort product positions; only the requested page becomes objects
+            order = self._sort_products(indices, sort_by, scores)
 
             # Apply pagination
-            total_count = len(sorted_products)
+            total_count = len(order)
             total_pages = (total_count + page_size - 1) // page_size
             start_idx = (page - 1) * page_size
             end_idx = start_idx + page_size
-            paginated_products = sorted_products[start_idx:end_idx]
+            page_positions = order[start_idx:end_idx]
+            paginated_products = [self.products[i] for i in page_positions]
+            page_scores = []
+            if scores is not None:
+                score_by_position = dict(zip(indices, scores))
+                page_scores = [score_by_position[i] for i in page_positions]
 
             return SearchResult(
                 products=paginated_products,
                 total_count=total_count,
                 page=page,
                 page_size=page_size,
-                total_pages=total_pages
+                total_pages=total_pages,
+                relevance_scores=page_scores
             )
 
         except Exception as e:
             # Simulate database connection error handling
             raise ConnectionError(f"Database error during search: {str(e)}")
 
+    def _cached_matches(
+        self,
+        query: str,
+        category: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        available_only: bool
+    ) -> Tuple[Tuple[int, ...], Optional[Tuple[float, ...]]]:
+        """Matching positions and relevance scores, memoized per filter set."""
+        key = (
+            query.lower() if query else '',
+            category.lower() if category else None,
+            min_price,
+            max_price,
+            available_only
+        )
+        with self._results_cache_lock:
+            entry = self._results_cache.get(key)
+            if entry is not None:
+                self._results_cache.move_to_end(key)
+                return entry
+
+        indices = tuple(self._filter_products(query, category, min_price, max_price, available_only))
+        scores = tuple(self._calculate_relevance(query, indices)) if query else None
+        entry = (indices, scores)
+
+        with self._results_cache_lock:
+            self._results_cache[key] = entry
+            if len(self._results_cache) > RESULTS_CACHE_SIZE:
+                self._results_cache.popitem(last=False)
+        return entry
+
     def _filter_products(
         self,
         query: str,
@@ -120,65 +216,169 @@ class ProductSearchEngine:
         min_price: Optional[float],
         max_price: Optional[float],
         available_only: bool
-    ) -> List[Product]:
-        """Apply all filters to product list."""
-        results = self.products
+    ) -> List[int]:
+        """Apply all filters and return the positions of matching products."""
+        if np is None:
+            return self._filter_product_list(query, category, min_price, max_price, available_only)
+
+        mask = np.ones(len(self.products), dtype=np.bool_)
 
         # Handle empty query gracefully
         if query:
             query_lower = query.lower()
-            results = [
-                p for p in results
-                if query_lower in p.name.lower() or query_lower in p.description.lower()
-            ]
+            candidates = self._query_candidates(query_lower)
+            if candidates is not None:
+                mask[:] = False
+                mask[candidates] = True
+            else:
+                mask &= (np.char.find(self._name_array, query_lower) >= 0) | \
+                    (np.char.find(self._desc_array, query_lower) >= 0)
 
         if category:
-            results = [p for p in results if p.category.lower() == category.lower()]
+            mask &= self._category_array == category.lower()
 
         if min_price is not None:
-            results = [p for p in results if p.price >= min_price]
+            mask &= self._prices >= min_price
 
         if max_price is not None:
-            results = [p for p in results if p.price <= max_price]
+            mask &= self._prices <= max_price
 
         if available_only:
-            results = [p for p in results if p.availability]
+            mask &= self._availability
 
-        return results
+        return np.flatnonzero(mask).tolist()
 
-    def _calculate_relevance(self, query: str, products: List[Product]) -> List[Product]:
-        """Calculate relevance scores for search results."""
+    def _filter_product_list(
+        self,
+        query: str,
+        category: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        available_only: bool
+    ) -> List[int]:
+        """Pure-Python version of _filter_products for when NumPy is missing."""
+        products = self.products
+        results = range(len(products))
+
+        if query:
+            query_lower = query.lower()
+            results = self._query_candidates(query_lower)
+            if results is None:
+                names, descs = self._names_lower, self._descs_lower
+                results = [
+                    i for i in range(len(products))
+                    if query_lower in names[i] or query_lower in descs[i]
+                ]
+
+        if category:
+            category_lower = category.lower()
+            categories = self._categories_lower
+            results = [i for i in results if categories[i] == category_lower]
+
+        if min_price is not None:
+            results = [i for i in results if products[i].price >= min_price]
+
+        if max_price is not None:
+            results = [i for i in results if products[i].price <= max_price]
+
+        if available_only:
+            results = [i for i in results if products[i].availability]
+
+        return list(results)
+
+    def _query_candidates(self, query_lower: str) -> Optional[List[int]]:
+        """
+        Positions of products whose name or description contains the query,
+        found through the inverted index.
+
+        Every word in the query must occur inside some indexed token, so the
+        postings of matching tokens are intersected (smallest first) and only
+        those candidates get the substring check. Returns None when the query
+        has no word characters, in which case callers scan everything.
+        """
+        query_tokens = set(TOKEN_PATTERN.findall(query_lower))
+        if not query_tokens:
+            return None
+
+        postings = []
+        for query_token in query_tokens:
+            # Partial words count too: merge postings of every token
+            # containing this one (the vocabulary is far smaller than N)
+            matched = set()
+            for token, positions in self._postings.items():
+                if query_token in token:
+                    matched |= positions
+            postings.append(matched)
+
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        names, descs = self._names_lower, self._descs_lower
+        return sorted(
+            i for i in candidates
+            if query_lower in names[i] or query_lower in descs[i]
+        )
+
+    def _calculate_relevance(self, query: str, indices: Sequence[int]) -> List[float]:
+        """Calculate relevance scores for the products at the given positions."""
         query_lower = query.lower()
-        for product in products:
-            score = 0.0
-            # Exact name match gets highest score
-            if query_lower == product.name.lower():
-                score += 100
-            # Name contains query
-            elif query_lower in product.name.lower():
-                score += 50
-            # Description contains query
-            if query_lower in product.description.lower():
-                score += 20
-            # Boost for availability
-            if product.availability:
-                score += 10
-            product.relevance_score = score
-        return products
-
-    def _sort_products(self, products: List[Product], sort_by: SortOrder) -> List[Product]:
-        """Sort products based on specified order."""
-        if sort_by == SortOrder.RELEVANCE:
-            return sorted(products, key=lambda p: p.relevance_score, reverse=True)
-        elif sort_by == SortOrder.PRICE_ASC:
-            return sorted(products, key=lambda p: p.price)
-        elif sort_by == SortOrder.PRICE_DESC:
-            return sorted(products, key=lambda p: p.price, reverse=True)
-        elif sort_by == SortOrder.NAME_ASC:
-            return sorted(products, key=lambda p: p.name.lower())
-        elif sort_by == SortOrder.NAME_DESC:
-            return sorted(products, key=lambda p: p.name.lower(), reverse=True)
-        return products
+        if np is not None and indices:
+            # Same weights as relevance_score, computed over whole columns
+            positions = np.asarray(indices, dtype=np.intp)
+            names = self._name_array[positions]
+            name_exact = names == query_lower
+            name_contains = np.char.find(names, query_lower) >= 0
+            desc_contains = np.char.find(self._desc_array[positions], query_lower) >= 0
+            scores = (
+                np.where(name_exact, 100.0, np.where(name_contains, 50.0, 0.0))
+                + 20.0 * desc_contains
+                + 10.0 * self._availability[positions]
+            )
+            return scores.tolist()
+
+        names, descs, products = self._names_lower, self._descs_lower, self.products
+        return [
+            relevance_score(query_lower, names[i], descs[i], products[i].availability)
+            for i in indices
+        ]
+
+    def _sort_products(
+        self,
+        indices: Sequence[int],
+        sort_by: SortOrder,
+        scores: Optional[Sequence[float]] = None
+    ) -> List[int]:
+        """Order product positions by the requested sort (stable, like sorted())."""
+        if sort_by not in SORT_KEYS:
+            return list(indices)
+        key_name, descending = SORT_KEYS[sort_by]
+        if key_name == 'relevance' and scores is None:
+            # Nothing to rank by without a query: keep the filter order
+            return list(indices)
+
+        if np is None:
+            if key_name == 'relevance':
+                keys = scores
+            elif key_name == 'price':
+                keys = [self.products[i].price for i in indices]
+            else:
+                keys = [self._names_lower[i] for i in indices]
+            order = sorted(range(len(indices)), key=keys.__getitem__, reverse=descending)
+            return [indices[k] for k in order]
+
+        positions = np.asarray(indices, dtype=np.intp)
+        if key_name == 'relevance':
+            keys = np.asarray(scores, dtype=np.float64)
+        elif key_name == 'price':
+            keys = self._prices[positions]
+        else:
+            keys = self._name_array[positions]
+        if descending:
+            # Negate (ranks, for strings) so a stable ascending sort keeps
+            # ties in their original order, as sorted(reverse=True) does
+            if keys.dtype.kind == 'U':
+                keys = np.unique(keys, return_inverse=True)[1]
+            keys = -keys
+        return positions[np.argsort(keys, kind='stable')].tolist()
 
 
 # Example usage
@@ -205,5 +405,5 @@ if __name__ == "__main__":
     )
 
     print(f"Found {results.total_count} products:")
-    for product in results.products:
-        print(f"- {product.name}: ${product.price} (Score: {product.relevance_score})")
+    for product, score in zip(results.products, results.relevance_scores):
+        print(f"- {product.name}: ${product.price} (Score: {score})")
@@ -5,8 +5,9 @@ Includes: Add, remove, update items, calculate totals, apply discounts.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, FrozenSet, Optional, Tuple
 from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
 from datetime import datetime
 from enum import Enum
 import json
@@ -28,7 +29,49 @@ class UserTier(Enum):
     PLATINUM = "platinum"
 
 
-@dataclass
+# Amounts are computed internally as integer cents and rates as exact
+# fractions, converting back to Decimal only for presentation
+BPS_PER_UNIT = 10000
+
+ALL_TIERS = frozenset(UserTier)
+# Declaration order, for listing tiers in messages
+TIER_ORDER = {tier: position for position, tier in enumerate(UserTier)}
+
+# Loyalty discount per user tier, in basis points
+LOYALTY_DISCOUNT_BPS = {
+    UserTier.BRONZE: 500,
+    UserTier.SILVER: 1000,
+    UserTier.GOLD: 1500,
+    UserTier.PLATINUM: 2000,
+}
+
+
+def _to_cents(amount: Decimal) -> int:
+    """Convert a money amount to whole cents."""
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def _cents_to_decimal(cents: int) -> Decimal:
+    """Convert whole cents back to a two-place Decimal."""
+    return Decimal(cents).scaleb(-2)
+
+
+def _round_fraction(amount: Fraction) -> int:
+    """Round an exact amount of cents to whole cents, half up."""
+    return _round_half_up(amount.numerator, amount.denominator)
+
+
+def _round_half_up(numerator: int, denominator: int) -> int:
+    """Integer division rounding halves away from zero, like ROUND_HALF_UP."""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if 2 * remainder >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+# Products, discounts and shipping options are frozen so the cents derived
+# from them in __post_init__ can never go stale; use dataclasses.replace()
+@dataclass(slots=True, frozen=True)
 class Product:
     id: int
     name: str
@@ -36,37 +79,73 @@ class Product:
     stock: int
     max_quantity: int = 10
     min_quantity: int = 1
+    price_cents: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'price_cents', _to_cents(self.price))
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Discount:
     code: str
     type: DiscountType
     value: Decimal
     min_purchase: Decimal = Decimal('0')
-    applicable_tiers: List[UserTier] = field(default_factory=lambda: list(UserTier))
+    applicable_tiers: FrozenSet[UserTier] = ALL_TIERS
     expiry: Optional[datetime] = None
     stackable: bool = True
-
-
-@dataclass
+    # Exact value: share of the subtotal for percentages, cents for fixed amounts
+    value_ratio: Fraction = field(init=False, repr=False, compare=False)
+    min_purchase_cents: Fraction = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Accept any iterable of tiers; a frozenset gives O(1) eligibility checks
+        object.__setattr__(self, 'applicable_tiers', frozenset(self.applicable_tiers))
+        value = Fraction(self.value)
+        object.__setattr__(
+            self, 'value_ratio',
+            value / 100 if self.type == DiscountType.PERCENTAGE else value * 100
+        )
+        object.__setattr__(self, 'min_purchase_cents', Fraction(self.min_purchase) * 100)
+
+
+@dataclass(slots=True)
 class CartItem:
     product: Product
     quantity: int
     gift_wrap: bool = False
     special_instructions: Optional[str] = None
+    # Subtotal cache, valid while quantity equals _subtotal_quantity
+    _subtotal_quantity: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    _subtotal_cents: int = field(default=0, init=False, repr=False, compare=False)
+    _subtotal: Optional[Decimal] = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def subtotal(self) -> Decimal:
-        return self.product.price * Decimal(self.quantity)
+        cents = self.subtotal_cents
+        if self._subtotal is None:
+            self._subtotal = _cents_to_decimal(cents)
+        return self._subtotal
+
+    @property
+    def subtotal_cents(self) -> int:
+        if self._subtotal_quantity != self.quantity:
+            self._subtotal_cents = self.product.price_cents * self.quantity
+            self._subtotal = None
+            self._subtotal_quantity = self.quantity
+        return self._subtotal_cents
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ShippingOption:
     id: str
     name: str
     cost: Decimal
     estimated_days: int
+    cost_cents: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'cost_cents', _to_cents(self.cost))
 
 
 class CartError(Exception):
@@ -90,7 +169,12 @@ class DiscountNotApplicableError(CartError):
 
 
 class ShoppingCart:
-    """Complete shopping cart system with discounts and persistence."""
+    """
+    Complete shopping cart system with discounts and persistence.
+
+    Totals are cached and recomputed only after the cart's own methods (or
+    its tax_rate/user_tier setters) change what they depend on.
+    """
 
     def __init__(
         self,
@@ -101,13 +185,41 @@ class ShoppingCart:
     ):
         self.user_id = user_id
         self.user_tier = user_tier
-        self.tax_rate = tax_rate
+        self.tax_rate = tax_rate  # also sets _tax_ratio
         self.currency = currency
-        self.items: List[CartItem] = []
+        # Keyed by product ID; dicts keep insertion order for display
+        self._items: Dict[int, CartItem] = {}
         self.applied_discounts: List[Discount] = []
         self.shipping_option: Optional[ShippingOption] = None
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
+        self._invalidate_totals()
+
+    @property
+    def items(self) -> Tuple[CartItem, ...]:
+        """Cart items in the order they were added (read-only; use add_item etc.)."""
+        return tuple(self._items.values())
+
+    @property
+    def tax_rate(self) -> Decimal:
+        return self._tax_rate
+
+    @tax_rate.setter
+    def tax_rate(self, rate: Decimal) -> None:
+        self._tax_rate = rate
+        # Exact, so rates finer than a basis point (e.g. 8.875%) are kept
+        self._tax_ratio = Fraction(rate)
+        self._invalidate_totals()
+
+    @property
+    def user_tier(self) -> UserTier:
+        return self._user_tier
+
+    @user_tier.setter
+    def user_tier(self, tier: UserTier) -> None:
+        # Loyalty discounts depend on the tier
+        self._user_tier = tier
+        self._invalidate_totals()
 
     def add_item(
         self,
@@ -140,7 +252,7 @@ class ShoppingCart:
             )
 
         # Check if item already in cart
-        existing_item = self._find_item(product.id)
+        existing_item = self._items.get(product.id)
         if existing_item:
             new_quantity = existing_item.quantity + quantity
             if new_quantity > product.max_quantity:
@@ -165,8 +277,9 @@ class ShoppingCart:
                 gift_wrap=gift_wrap,
                 special_instructions=special_instructions
             )
-            self.items.append(cart_item)
+            self._items[product.id] = cart_item
 
+        self._invalidate_totals()
         self.updated_at = datetime.now()
 
     def remove_item(self, product_id: int) -> bool:
@@ -179,12 +292,11 @@ class ShoppingCart:
         Returns:
             True if item was removed, False if not found
         """
-        for i, item in enumerate(self.items):
-            if item.product.id == product_id:
-                self.items.pop(i)
-                self.updated_at = datetime.now()
-                return True
-        return False
+        if self._items.pop(product_id, None) is None:
+            return False
+        self._invalidate_totals()
+        self.updated_at = datetime.now()
+        return True
 
     def update_quantity(self, product_id: int, quantity: int) -> None:
         """
@@ -217,6 +329,7 @@ class ShoppingCart:
             )
 
         item.quantity = quantity
+        self._invalidate_totals()
         self.updated_at = datetime.now()
 
     def apply_discount(self, discount: Discount) -> None:
@@ -236,12 +349,12 @@ class ShoppingCart:
         # Check user tier eligibility
         if discount.applicable_tiers and self.user_tier not in discount.applicable_tiers:
             raise DiscountNotApplicableError(
-                f"Discount only available for {[t.value for t in discount.applicable_tiers]}"
+                f"Discount only available for "
+                f"{[t.value for t in sorted(discount.applicable_tiers, key=TIER_ORDER.__getitem__)]}"
             )
 
         # Check minimum purchase
-        subtotal = self.calculate_subtotal()
-        if subtotal < discount.min_purchase:
+        if self._price_pass()[0] < discount.min_purchase_cents:
             raise DiscountNotApplicableError(
                 f"Minimum purchase of {self._format_currency(discount.min_purchase)} required"
             )
@@ -253,63 +366,39 @@ class ShoppingCart:
             )
 
         self.applied_discounts.append(discount)
+        self._invalidate_totals()
         self.updated_at = datetime.now()
 
     def set_shipping(self, shipping_option: ShippingOption) -> None:
         """Set shipping method."""
         self.shipping_option = shipping_option
+        self._invalidate_totals()
         self.updated_at = datetime.now()
 
     def calculate_subtotal(self) -> Decimal:
         """Calculate subtotal before discounts and tax."""
-        return sum(item.subtotal for item in self.items)
+        return _cents_to_decimal(self._price_pass()[0])
 
     def calculate_discount_amount(self) -> Decimal:
         """Calculate total discount amount."""
-        subtotal = self.calculate_subtotal()
-        total_discount = Decimal('0')
-
-        for discount in self.applied_discounts:
-            if discount.type == DiscountType.PERCENTAGE:
-                total_discount += subtotal * (discount.value / Decimal('100'))
-            elif discount.type == DiscountType.FIXED_AMOUNT:
-                total_discount += discount.value
-            elif discount.type == DiscountType.LOYALTY:
-                # Loyalty discount based on user tier
-                tier_discounts = {
-                    UserTier.BRONZE: Decimal('5'),
-                    UserTier.SILVER: Decimal('10'),
-                    UserTier.GOLD: Decimal('15'),
-                    UserTier.PLATINUM: Decimal('20'),
-                }
-                tier_percent = tier_discounts.get(self.user_tier, Decimal('0'))
-                total_discount += subtotal * (tier_percent / Decimal('100'))
-
-        return total_discount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return _cents_to_decimal(self._price_pass()[1])
 
     def calculate_tax(self) -> Decimal:
         """Calculate tax on subtotal after discounts."""
-        taxable_amount = self.calculate_subtotal() - self.calculate_discount_amount()
-        tax = taxable_amount * self.tax_rate
-        return tax.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return _cents_to_decimal(self._price_pass()[2])
 
     def calculate_shipping(self) -> Decimal:
         """Calculate shipping cost."""
-        if not self.shipping_option:
-            return Decimal('0')
-        return self.shipping_option.cost
+        return _cents_to_decimal(self._price_pass()[3])
 
     def calculate_total(self) -> Decimal:
         """Calculate final total including tax and shipping."""
-        subtotal = self.calculate_subtotal()
-        discount = self.calculate_discount_amount()
-        tax = self.calculate_tax()
-        shipping = self.calculate_shipping()
-        total = subtotal - discount + tax + shipping
-        return total.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        subtotal, discount, tax, shipping = self._price_pass()
+        return _cents_to_decimal(subtotal - discount + tax + shipping)
 
     def get_summary(self) -> Dict:
         """Get complete cart summary."""
+        subtotal, discount, tax, shipping = self._price_pass()
         return {
             'items': [
                 {
@@ -321,13 +410,13 @@ class ShoppingCart:
                     'gift_wrap': item.gift_wrap,
                     'special_instructions': item.special_instructions
                 }
-                for item in self.items
+                for item in self._items.values()
             ],
-            'subtotal': str(self.calculate_subtotal()),
-            'discount': str(self.calculate_discount_amount()),
-            'tax': str(self.calculate_tax()),
-            'shipping': str(self.calculate_shipping()),
-            'total': str(self.calculate_total()),
+            'subtotal': str(_cents_to_decimal(subtotal)),
+            'discount': str(_cents_to_decimal(discount)),
+            'tax': str(_cents_to_decimal(tax)),
+            'shipping': str(_cents_to_decimal(shipping)),
+            'total': str(_cents_to_decimal(subtotal - discount + tax + shipping)),
             'currency': self.currency,
             'applied_discounts': [d.code for d in self.applied_discounts],
             'user_tier': self.user_tier.value,
@@ -339,10 +428,43 @@ class ShoppingCart:
 
     def _find_item(self, product_id: int) -> Optional[CartItem]:
         """Find cart item by product ID."""
-        for item in self.items:
-            if item.product.id == product_id:
-                return item
-        return None
+        return self._items.get(product_id)
+
+    def _invalidate_totals(self) -> None:
+        """Drop cached totals after the cart changes."""
+        self._totals: Optional[Tuple[int, int, int, int]] = None
+
+    def _price_pass(self) -> Tuple[int, int, int, int]:
+        """
+        Compute (subtotal, discount, tax, shipping) in cents in one pass.
+
+        The subtotal is summed once and each figure is derived from it,
+        then the result is cached until the cart changes.
+        """
+        if self._totals is not None:
+            return self._totals
+
+        subtotal = sum(item.subtotal_cents for item in self._items.values())
+
+        # Summed exactly and rounded once, as the Decimal version quantized
+        # only the final sum
+        total_discount = Fraction(0)
+        for discount in self.applied_discounts:
+            if discount.type == DiscountType.PERCENTAGE:
+                total_discount += subtotal * discount.value_ratio
+            elif discount.type == DiscountType.FIXED_AMOUNT:
+                total_discount += discount.value_ratio
+            elif discount.type == DiscountType.LOYALTY:
+                # Loyalty discount based on user tier
+                tier_bps = LOYALTY_DISCOUNT_BPS.get(self.user_tier, 0)
+                total_discount += Fraction(subtotal * tier_bps, BPS_PER_UNIT)
+        discount = _round_fraction(total_discount)
+
+        tax = _round_fraction((subtotal - discount) * self._tax_ratio)
+        shipping = self.shipping_option.cost_cents if self.shipping_option else 0
+
+        self._totals = (subtotal, discount, tax, shipping)
+        return self._totals
 
     def _format_currency(self, amount: Decimal) -> str:
         """Format amount as currency string."""
@@ -0,0 +1,46 @@
+import dataclasses
+from decimal import Decimal
+
+import pytest
+from shopping_cart import Discount, DiscountNotApplicableError, DiscountType, Product, ShoppingCart
+
+
+def test_sub_basis_point_rates_are_exact():
+    """Test that rates finer than 0.01% are not rounded before use"""
+    cart = ShoppingCart(tax_rate=Decimal('0.08875'))
+    cart.add_item(Product(1, "Desk", Decimal('1000.00'), stock=1))
+    cart.apply_discount(Discount("ODD", DiscountType.PERCENTAGE, Decimal('12.345')))
+
+    summary = cart.get_summary()
+    assert summary['discount'] == '123.45'
+    assert summary['tax'] == '77.79'
+    assert summary['total'] == '954.34'
+
+
+def test_sub_cent_minimum_purchase():
+    """Test that a minimum purchase just above the subtotal is still enforced"""
+    cart = ShoppingCart()
+    cart.add_item(Product(1, "Desk", Decimal('100.00'), stock=1))
+    with pytest.raises(DiscountNotApplicableError, match="Minimum purchase"):
+        cart.apply_discount(
+            Discount("MIN", DiscountType.FIXED_AMOUNT, Decimal('5'), min_purchase=Decimal('100.004'))
+        )
+
+
+def test_product_price_cannot_go_stale():
+    """Test that a product's price can't change under its cached cents"""
+    product = Product(1, "Desk", Decimal('1000.00'), stock=1)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        product.price = Decimal('500.00')
+
+    cheaper = dataclasses.replace(product, price=Decimal('500.00'))
+    assert cheaper.price_cents == 50000
+
+
+def test_items_view_is_read_only():
+    """Test that mutating the items view fails instead of being ignored"""
+    cart = ShoppingCart()
+    cart.add_item(Product(1, "Desk", Decimal('10.00'), stock=1))
+    with pytest.raises(AttributeError):
+        cart.items.append(None)
+    assert len(cart.items) == 1
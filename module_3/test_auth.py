@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base
+from auth import login, rate_limiter, register_user
+
+
+@pytest.fixture
+def session():
+    """Fresh in-memory database and a clean rate limiter for each test"""
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    rate_limiter.reset_attempts('alice')
+    yield db_session
+    db_session.close()
+    rate_limiter.reset_attempts('alice')
+
+
+def test_login_success(session):
+    """Test that the registered password logs in"""
+    register_user(session, 'alice', 'alice@example.com', 'OldPass123')
+    success, message, user = login(session, 'alice', 'OldPass123')
+    assert success
+    assert user.username == 'alice'
+
+
+def test_repeated_failures_use_cached_hash(session):
+    """Test that failures after the first still count and the right password still works"""
+    register_user(session, 'alice', 'alice@example.com', 'OldPass123')
+    assert not login(session, 'alice', 'wrong-pass')[0]
+    assert not login(session, 'alice', 'wrong-pass')[0]
+    assert rate_limiter.get_cached_user('alice') is not None
+
+    success, _, user = login(session, 'alice', 'OldPass123')
+    assert success
+    assert user.failed_login_attempts == 0
+
+
+def test_password_changed_while_hash_cached(session):
+    """Test that a cached hash never outlives a password change"""
+    _, _, user = register_user(session, 'alice', 'alice@example.com', 'OldPass123')
+    assert not login(session, 'alice', 'wrong-pass')[0]
+    assert rate_limiter.get_cached_user('alice') is not None
+
+    user.set_password('NewPass456')
+    session.commit()
+
+    assert login(session, 'alice', 'OldPass123') == (False, "Invalid username or password.", None)
+    success, message, _ = login(session, 'alice', 'NewPass456')
+    assert success, message
+
+
+def test_new_password_accepted_while_old_hash_cached(session):
+    """Test that the new password works straight away after a reset"""
+    _, _, user = register_user(session, 'alice', 'alice@example.com', 'OldPass123')
+    assert not login(session, 'alice', 'wrong-pass')[0]
+
+    user.set_password('NewPass456')
+    session.commit()
+
+    success, message, _ = login(session, 'alice', 'NewPass456')
+    assert success, message
+
+
+def test_account_disabled_while_hash_cached(session):
+    """Test that a disabled account is reported as disabled and not counted"""
+    _, _, user = register_user(session, 'alice', 'alice@example.com', 'OldPass123')
+    assert not login(session, 'alice', 'wrong-pass')[0]
+    assert rate_limiter.get_cached_user('alice') is not None
+
+    user.is_active = False
+    session.commit()
+
+    assert login(session, 'alice', 'wrong-pass') == (False, "Account is disabled. Contact support.", None)
+    session.refresh(user)
+    assert user.failed_login_attempts == 1